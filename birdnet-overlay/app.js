@@ -1,4 +1,4 @@
-const DATA_URL = "data/latest.json";
+const DATA_URL = "/api/status";
 const POLL_MS = 2000;
 const DEFAULT_OPEN_MS = 60000;
 const BETWEEN_MS = 1000;
@@ -305,7 +305,7 @@ function tryAdvance(now) {
 
 async function refresh() {
   try {
-    const response = await fetch(DATA_URL + "?t=" + Date.now(), { cache: "no-store" });
+    const response = await fetch(DATA_URL, { cache: "no-cache" });
     if (!response.ok) {
       throw new Error("No data");
     }
@@ -2,29 +2,36 @@
 import audioop
 import base64
 import csv
-import cgi
+import functools
 import hmac
 import queue
 import io
 import math
 import wave
 import hashlib
+import heapq
+import itertools
 import json
 import os
 import re
+import selectors
 import shlex
 import shutil
 import signal
+import socket
 import sqlite3
 import subprocess
 import sys
+import tempfile
 import threading
 import time
 import uuid
 import urllib.error
 import urllib.request
 import mimetypes
-from copy import deepcopy
+from email.message import Message
+from collections import deque
+from copy import copy, deepcopy
 from datetime import datetime, timezone, timedelta
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
@@ -52,10 +59,46 @@ GATE_WORKERS = 1
 ANALYSIS_WORKERS = 3
 MAX_ANALYSIS_BACKLOG = 24
 MAX_SEGMENT_AGE_SECONDS = 30.0
+MIGRATION_BATCH_ROWS = 5000
+JSONL_BULK_READ_BYTES = 64 * 1024 * 1024
+CSV_CHUNK_CHARS = 64 * 1024
+LOG_COLUMNS = "id, timestamp, species, scientific_name, confidence, location, raw_json"
+LOG_TYPED_FIELDS = frozenset({"id", "timestamp", "species", "scientific_name", "confidence", "location"})
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+SEGMENT_SCAN_TTL_SECONDS = 0.1
+DB_MMAP_BYTES = 256 * 1024 * 1024
+DB_CACHE_KIB = 20000
+DB_OPTIMIZE_SECONDS = 15 * 60
+SEGMENT_RESCAN_SECONDS = 5.0
+MAX_JSON_BODY_BYTES = 1024 * 1024
+MAX_ICON_UPLOAD_BYTES = 16 * 1024 * 1024
+MULTIPART_CHUNK_BYTES = 64 * 1024
+MULTIPART_FIELD_BYTES = 64 * 1024
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+SERVER_IDLE_TIMEOUT_SECONDS = 30.0
+CONNECTION_TIMEOUT_SECONDS = 120.0
+AUTH_VERIFIED_MAX = 16
+EVENT_BATCH_SIZE = 64
+EVENT_FLUSH_SECONDS = 0.5
+SENSITIVE_QUERY_KEYS = frozenset({
+  "password",
+  "pass",
+  "passwd",
+  "pwd",
+  "token",
+  "api_key",
+  "apikey",
+  "auth",
+  "authorization",
+})
+SEGMENT_PREFIX = "segment_"
+SEGMENT_SUFFIX = ".wav"
 FALLBACK_FFMPEG_PATHS = (
   "/opt/homebrew/bin/ffmpeg",
   "/usr/local/bin/ffmpeg",
 )
+SLUG_PATTERN = re.compile(r"[^a-zA-Z0-9]+")
+AUDIO_DEVICE_PATTERN = re.compile(r"\[(\d+)\]\s(.+)$")
 
 DEFAULT_CONFIG = {
   "http_port": 8002,
@@ -88,34 +131,62 @@ write_lock = threading.Lock()
 analysis_error_lock = threading.Lock()
 analysis_last_error = None
 config_lock = threading.Lock()
+config_snapshot = None
+auth_settings = None
+auth_verified = {}
 log_lock = threading.Lock()
 event_lock = threading.Lock()
 restart_capture = threading.Event()
 last_detection_lock = threading.Lock()
 last_detection = None
-log_revision_lock = threading.Lock()
-log_revision = int(time.time() * 1000)
+# next() on itertools.count is atomic under the GIL, so bumps need no lock.
+log_revision_counter = itertools.count(int(time.time() * 1000))
+log_revision = next(log_revision_counter)
 species_lock = threading.Lock()
 species_set = set()
-species_count_lock = threading.Lock()
 species_counts = {}
+species_ranks = None
 capture_pid_lock = threading.Lock()
 current_capture_pid = None
 discord_state_lock = threading.Lock()
 sunset_cache_lock = threading.Lock()
 sunset_cache = {}
+summary_memo_lock = threading.Lock()
+summary_memo = None
+segment_scan_lock = threading.Lock()
+segment_scan = None
+json_file_cache_lock = threading.Lock()
+json_file_cache = {}
+settings_cache_lock = threading.Lock()
+settings_cache = None
+settings_generation = 0
+latest_cache_lock = threading.Lock()
+latest_cache = None
+latest_signature = None
+icon_index_lock = threading.Lock()
+icon_index_cache = None
+icon_index_generation = 0
+event_queue = queue.Queue()
+event_writer_lock = threading.Lock()
+event_writer_thread = None
+segment_notice_cv = threading.Condition()
+segment_notices = deque()
+last_segment_notice = 0.0
+db_local = threading.local()
+ffmpeg_path_cache = None
 
 
 def restart_server_process():
   # Delay a bit so the HTTP response can flush before process replacement.
   time.sleep(0.2)
+  flush_pending_writes()
   python = sys.executable
   args = [python, *sys.argv]
   os.execv(python, args)
 
 
 def now_iso():
-  return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+  return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
 
 
 def current_week():
@@ -126,56 +197,57 @@ def current_week():
 
 
 def get_log_revision():
-  with log_revision_lock:
-    return log_revision
+  return log_revision
 
 
 def bump_log_revision():
   global log_revision
-  with log_revision_lock:
-    candidate = int(time.time() * 1000)
-    if candidate <= log_revision:
-      candidate = log_revision + 1
-    log_revision = candidate
-    return log_revision
+  revision = next(log_revision_counter)
+  log_revision = revision
+  return revision
 
 
-def rebuild_species_set():
-  entries = read_log(None)
-  species = set()
-  for entry in entries:
-    species.add(entry.get("species", "Unknown") or "Unknown")
+def rebuild_species_state():
+  counts = {}
+  try:
+    with db_connect() as connection:
+      rows = connection.execute("SELECT species, COUNT(1) AS heard_count FROM detections GROUP BY species").fetchall()
+  except sqlite3.Error:
+    rows = []
+  for row in rows:
+    name = row["species"] or "Unknown"
+    counts[name] = counts.get(name, 0) + int(row["heard_count"])
+  species = set(counts)
   with species_lock:
-    global species_set
+    global species_set, species_counts, species_ranks
     species_set = species
-
-
-def rebuild_species_counts():
-  entries = read_log(None)
-  counts = {}
-  for entry in entries:
-    species = entry.get("species", "Unknown") or "Unknown"
-    counts[species] = counts.get(species, 0) + 1
-  with species_count_lock:
-    global species_counts
     species_counts = counts
+    species_ranks = None
 
 
-def update_species_set(entries):
+def update_species_state(entries):
   if isinstance(entries, dict):
     entries = [entries]
+  global species_ranks
   with species_lock:
-    for entry in entries:
-      species_set.add(entry.get("species", "Unknown") or "Unknown")
-
-
-def update_species_counts(entries):
-  if isinstance(entries, dict):
-    entries = [entries]
-  with species_count_lock:
     for entry in entries:
       species = entry.get("species", "Unknown") or "Unknown"
+      species_set.add(species)
       species_counts[species] = species_counts.get(species, 0) + 1
+    species_ranks = None
+
+
+def discard_species_entry(species):
+  global species_ranks
+  species = species or "Unknown"
+  with species_lock:
+    species_ranks = None
+    remaining = species_counts.get(species, 0) - 1
+    if remaining > 0:
+      species_counts[species] = remaining
+      return
+    species_counts.pop(species, None)
+    species_set.discard(species)
 
 
 def get_species_count():
@@ -186,22 +258,19 @@ def get_species_count():
 def get_species_heard_count(species):
   if not species:
     return 0
-  with species_count_lock:
+  with species_lock:
     return species_counts.get(species, 0)
 
 
 def get_species_rank(species):
   if not species:
     return None
-  with species_count_lock:
-    items = list(species_counts.items())
-  if not items:
-    return None
-  items.sort(key=lambda item: (-item[1], item[0]))
-  for index, (name, _count) in enumerate(items, start=1):
-    if name == species:
-      return index
-  return None
+  global species_ranks
+  with species_lock:
+    if species_ranks is None:
+      ordered = sorted(species_counts.items(), key=lambda item: (-item[1], item[0]))
+      species_ranks = {name: index for index, (name, _count) in enumerate(ordered, start=1)}
+    return species_ranks.get(species)
 
 
 def hash_password(password, salt=None, iterations=210000):
@@ -234,10 +303,17 @@ def verify_password(password, encoded_hash):
 
 
 def db_connect():
+  connection = getattr(db_local, "connection", None)
+  if connection is not None:
+    return connection
   connection = sqlite3.connect(str(DB_PATH), timeout=30)
   connection.row_factory = sqlite3.Row
   connection.execute("PRAGMA journal_mode=WAL")
   connection.execute("PRAGMA synchronous=NORMAL")
+  connection.execute(f"PRAGMA mmap_size={DB_MMAP_BYTES}")
+  connection.execute(f"PRAGMA cache_size=-{DB_CACHE_KIB}")
+  connection.execute("PRAGMA temp_store=MEMORY")
+  db_local.connection = connection
   return connection
 
 
@@ -253,7 +329,8 @@ def init_database():
         scientific_name TEXT,
         confidence REAL,
         location TEXT,
-        raw_json TEXT NOT NULL
+        raw_json TEXT NOT NULL,
+        ts_epoch INTEGER
       )
       """
     )
@@ -288,9 +365,29 @@ def init_database():
       )
       """
     )
+    columns = {row["name"] for row in connection.execute("PRAGMA table_info(detections)")}
+    if "ts_epoch" not in columns:
+      connection.execute("ALTER TABLE detections ADD COLUMN ts_epoch INTEGER")
+    # Runs on every start so an interrupted backfill resumes.
+    last_rowid = 0
+    while True:
+      rows = connection.execute(
+        "SELECT rowid, timestamp FROM detections WHERE ts_epoch IS NULL AND rowid > ? ORDER BY rowid LIMIT ?",
+        (last_rowid, MIGRATION_BATCH_ROWS),
+      ).fetchall()
+      if not rows:
+        break
+      connection.executemany(
+        "UPDATE detections SET ts_epoch = ? WHERE rowid = ?",
+        [(timestamp_epoch(row[1]), row[0]) for row in rows],
+      )
+      last_rowid = rows[-1][0]
     connection.execute(
       "CREATE INDEX IF NOT EXISTS idx_detections_timestamp ON detections(timestamp)"
     )
+    connection.execute(
+      "CREATE INDEX IF NOT EXISTS idx_detections_ts_epoch ON detections(ts_epoch)"
+    )
     connection.execute(
       "CREATE INDEX IF NOT EXISTS idx_detections_species ON detections(species)"
     )
@@ -303,23 +400,29 @@ def init_database():
 
 
 def iter_jsonl_file(path):
-  if not path.exists():
-    return
   try:
+    if path.stat().st_size <= JSONL_BULK_READ_BYTES:
+      yield from parse_jsonl_lines(path.read_text(encoding="utf-8").split("\n"))
+      return
     with path.open("r", encoding="utf-8") as handle:
-      for line in handle:
-        if not line.strip():
-          continue
-        try:
-          parsed = json.loads(line)
-        except json.JSONDecodeError:
-          continue
-        if isinstance(parsed, dict):
-          yield parsed
+      yield from parse_jsonl_lines(handle)
   except OSError:
     return
 
 
+def parse_jsonl_lines(lines):
+  loads = json.loads
+  for line in lines:
+    if not line or line.isspace():
+      continue
+    try:
+      parsed = loads(line)
+    except json.JSONDecodeError:
+      continue
+    if isinstance(parsed, dict):
+      yield parsed
+
+
 def migrate_legacy_jsonl_if_needed():
   with db_connect() as connection:
     det_count = connection.execute("SELECT COUNT(1) AS count FROM detections").fetchone()["count"]
@@ -330,23 +433,25 @@ def migrate_legacy_jsonl_if_needed():
       for row in iter_jsonl_file(LOG_PATH):
         row = dict(row)
         row["id"] = entry_id(row)
+        stamp = str(row.get("timestamp") or now_iso())
         payload.append(
           (
             row["id"],
-            str(row.get("timestamp") or now_iso()),
+            stamp,
             row.get("species", "Unknown"),
             row.get("scientific_name", ""),
             normalize_confidence(row.get("confidence")),
             row.get("location", ""),
-            json.dumps(row, ensure_ascii=True),
+            extra_fields_json(row),
+            timestamp_epoch(stamp),
           )
         )
-        if len(payload) >= 1000:
+        if len(payload) >= MIGRATION_BATCH_ROWS:
           connection.executemany(
             """
-            INSERT OR REPLACE INTO detections
-            (id, timestamp, species, scientific_name, confidence, location, raw_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT OR IGNORE INTO detections
+            (id, timestamp, species, scientific_name, confidence, location, raw_json, ts_epoch)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
             payload,
           )
@@ -354,9 +459,9 @@ def migrate_legacy_jsonl_if_needed():
       if payload:
         connection.executemany(
           """
-          INSERT OR REPLACE INTO detections
-          (id, timestamp, species, scientific_name, confidence, location, raw_json)
-          VALUES (?, ?, ?, ?, ?, ?, ?)
+          INSERT OR IGNORE INTO detections
+          (id, timestamp, species, scientific_name, confidence, location, raw_json, ts_epoch)
+          VALUES (?, ?, ?, ?, ?, ?, ?, ?)
           """,
           payload,
         )
@@ -372,13 +477,13 @@ def migrate_legacy_jsonl_if_needed():
             str(row.get("timestamp") or now_iso()),
             row.get("type", ""),
             row.get("message", ""),
-            json.dumps(row, ensure_ascii=True),
+            json.dumps(row, ensure_ascii=True, separators=(",", ":")),
           )
         )
-        if len(payload) >= 1000:
+        if len(payload) >= MIGRATION_BATCH_ROWS:
           connection.executemany(
             """
-            INSERT OR REPLACE INTO events
+            INSERT OR IGNORE INTO events
             (id, timestamp, type, message, raw_json)
             VALUES (?, ?, ?, ?, ?)
             """,
@@ -388,7 +493,7 @@ def migrate_legacy_jsonl_if_needed():
       if payload:
         connection.executemany(
           """
-          INSERT OR REPLACE INTO events
+          INSERT OR IGNORE INTO events
           (id, timestamp, type, message, raw_json)
           VALUES (?, ?, ?, ?, ?)
           """,
@@ -433,6 +538,7 @@ def migrate_legacy_icon_index_if_needed():
         payload,
       )
       connection.commit()
+  forget_icon_index()
 
 
 def load_config():
@@ -515,19 +621,77 @@ def load_config():
 
 
 def get_config_snapshot(config):
+  # Shared until the next write_config; treat as read-only.
+  global config_snapshot
+  week = current_week()
   with config_lock:
+    cached = config_snapshot
+    if cached and cached[0] is config and cached[1]["current_week"] == week:
+      return cached[1]
     snapshot = dict(config)
-  snapshot.pop("settings_auth_password_hash", None)
-  snapshot.pop("discord_webhook_url", None)
-  snapshot["current_week"] = current_week()
+    snapshot.pop("settings_auth_password_hash", None)
+    snapshot.pop("discord_webhook_url", None)
+    snapshot["current_week"] = week
+    config_snapshot = (config, snapshot)
   return snapshot
 
 
+def get_auth_settings(config):
+  global auth_settings
+  cached = auth_settings
+  if cached and cached[0] is config:
+    return cached[1]
+  with config_lock:
+    enabled = bool(config.get("settings_auth_enabled"))
+    user = str(config.get("settings_auth_user") or "admin").strip() or "admin"
+    password_hash = str(config.get("settings_auth_password_hash") or "").strip()
+    settings = {"enabled": bool(enabled and password_hash), "user": user, "password_hash": password_hash}
+    auth_settings = (config, settings)
+  return settings
+
+
 def write_config(config):
+  global config_snapshot, auth_settings
+  config_snapshot = None
+  auth_settings = None
+  auth_verified.clear()
+  forget_settings_body()
   encoded = json.dumps(config, ensure_ascii=True, indent=2)
   SETTINGS_PATH.write_text(encoded, encoding="utf-8")
 
 
+def encode_json_response(payload):
+  encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+  try:
+    return encoded.encode("utf-8")
+  except UnicodeEncodeError:
+    # Lone surrogates (e.g. from a posted "\ud800") can only travel escaped.
+    return json.dumps(payload, ensure_ascii=True, separators=(",", ":")).encode("utf-8")
+
+
+def forget_settings_body():
+  global settings_cache, settings_generation
+  with settings_cache_lock:
+    settings_cache = None
+    settings_generation += 1
+
+
+def get_settings_body(config):
+  global settings_cache
+  week = current_week()
+  with settings_cache_lock:
+    cached = settings_cache
+    generation = settings_generation
+  if cached and cached[0] == week:
+    return cached[1], cached[2]
+  body = encode_json_response(get_config_snapshot(config))
+  etag = f'"{time.monotonic_ns():x}"'
+  with settings_cache_lock:
+    if generation == settings_generation:
+      settings_cache = (week, etag, body)
+  return etag, body
+
+
 def update_config(config, updates):
   changed = set()
   restart_fields = {"input_mode", "input_device", "rtmp_url", "segment_seconds"}
@@ -632,11 +796,16 @@ def ensure_latest_file(config):
   DATA_DIR.mkdir(parents=True, exist_ok=True)
   TMP_DIR.mkdir(parents=True, exist_ok=True)
   CLIPS_DIR.mkdir(parents=True, exist_ok=True)
+  # Left behind by writers that died before their rename.
+  for stale_path in DATA_DIR.glob(f"{LATEST_PATH.stem}.tmp.*"):
+    try:
+      stale_path.unlink()
+    except OSError:
+      pass
   init_database()
   if not CLIP_INDEX_PATH.exists():
     CLIP_INDEX_PATH.write_text("{}", encoding="utf-8")
-  rebuild_species_set()
-  rebuild_species_counts()
+  rebuild_species_state()
   if not LATEST_PATH.exists():
     payload = build_payload(
       get_config_snapshot(config),
@@ -650,12 +819,57 @@ def ensure_latest_file(config):
 
 def write_latest(payload):
   payload = dict(payload)
+  # Compare everything but the timestamp, which build_payload sets on every call.
+  signature = json.dumps(
+    {key: value for key, value in payload.items() if key != "timestamp"},
+    ensure_ascii=True,
+    separators=(",", ":"),
+  )
+  with latest_cache_lock:
+    if latest_cache and latest_signature == signature:
+      return
   payload["timestamp"] = payload.get("timestamp") or now_iso()
-  encoded = json.dumps(payload, ensure_ascii=True, indent=2)
-  tmp_path = LATEST_PATH.with_suffix(".tmp")
-  with write_lock:
-    tmp_path.write_text(encoded, encoding="utf-8")
-    tmp_path.replace(LATEST_PATH)
+  body = json.dumps(payload, ensure_ascii=True, separators=(",", ":")).encode("utf-8")
+  tmp_path = LATEST_PATH.with_suffix(f".tmp.{os.getpid()}.{threading.get_ident()}")
+  replaced = False
+  try:
+    tmp_path.write_bytes(body)
+    with write_lock:
+      tmp_path.replace(LATEST_PATH)
+      replaced = True
+      remember_latest(body, signature)
+  finally:
+    if not replaced:
+      tmp_path.unlink(missing_ok=True)
+
+
+def remember_latest(body, signature):
+  global latest_cache, latest_signature
+  with latest_cache_lock:
+    latest_cache = (f'"{time.monotonic_ns():x}"', body)
+    latest_signature = signature
+
+
+def get_latest_body():
+  with latest_cache_lock:
+    cached = latest_cache
+  if cached:
+    return cached
+  try:
+    body = LATEST_PATH.read_bytes()
+    json.loads(body)
+  except (OSError, json.JSONDecodeError):
+    return None, b"{}"
+  return None, body
+
+
+def read_latest_payload():
+  _, body = get_latest_body()
+  try:
+    payload = json.loads(body)
+  except json.JSONDecodeError:
+    return {}
+  return payload if isinstance(payload, dict) else {}
 
 
 def build_payload(config, status, status_message, predictions):
@@ -697,6 +911,7 @@ def build_payload(config, status, status_message, predictions):
   }
 
 
+@functools.lru_cache(maxsize=32)
 def safe_stream_url(url):
   if not url:
     return ""
@@ -708,23 +923,12 @@ def safe_stream_url(url):
       if parts.port:
         host = f"{host}:{parts.port}"
       netloc = host
-    sensitive_query_keys = {
-      "password",
-      "pass",
-      "passwd",
-      "pwd",
-      "token",
-      "api_key",
-      "apikey",
-      "auth",
-      "authorization",
-    }
     query_pairs = parse_qsl(parts.query, keep_blank_values=True)
     redacted_pairs = []
     for key, value in query_pairs:
       lower_key = str(key).strip().lower()
       if (
-        lower_key in sensitive_query_keys
+        lower_key in SENSITIVE_QUERY_KEYS
         or "password" in lower_key
         or lower_key.endswith("_token")
         or lower_key.endswith("_key")
@@ -740,9 +944,7 @@ def safe_stream_url(url):
 
 def get_last_detection():
   with last_detection_lock:
-    if not last_detection:
-      return None
-    return deepcopy(last_detection)
+    return last_detection or None
 
 
 def parse_timestamp(value):
@@ -756,7 +958,24 @@ def parse_timestamp(value):
     return None
 
 
+def timestamp_epoch(value):
+  dt = parse_timestamp(value)
+  if dt is None:
+    return None
+  if dt.tzinfo is None:
+    # Naive stamps from old logs were written in local time.
+    dt = dt.astimezone()
+  return int(dt.timestamp())
+
+
+def forget_summary_memo():
+  global summary_memo
+  with summary_memo_lock:
+    summary_memo = None
+
+
 def invalidate_summary_cache():
+  forget_summary_memo()
   try:
     with db_connect() as connection:
       connection.execute("DELETE FROM summary_cache WHERE cache_key = 'log_summary'")
@@ -765,8 +984,18 @@ def invalidate_summary_cache():
     return
 
 
+def remember_summary(revision, payload):
+  global summary_memo
+  with summary_memo_lock:
+    summary_memo = (revision, payload)
+
+
 def get_cached_summary():
   current_revision = get_log_revision()
+  with summary_memo_lock:
+    memo = summary_memo
+  if memo and memo[0] == current_revision:
+    return memo[1]
   try:
     with db_connect() as connection:
       row = connection.execute(
@@ -786,6 +1015,7 @@ def get_cached_summary():
   except (TypeError, json.JSONDecodeError):
     return None
   if isinstance(payload, dict):
+    remember_summary(current_revision, payload)
     return payload
   return None
 
@@ -793,8 +1023,10 @@ def get_cached_summary():
 def set_cached_summary(payload):
   if not isinstance(payload, dict):
     return
+  revision = get_log_revision()
+  remember_summary(revision, payload)
   try:
-    encoded = json.dumps(payload, ensure_ascii=True)
+    encoded = json.dumps(payload, ensure_ascii=True, separators=(",", ":"))
     with db_connect() as connection:
       connection.execute(
         """
@@ -802,29 +1034,47 @@ def set_cached_summary(payload):
         (cache_key, log_revision, payload_json, updated_at)
         VALUES ('log_summary', ?, ?, ?)
         """,
-        (get_log_revision(), encoded, now_iso()),
+        (revision, encoded, now_iso()),
       )
       connection.commit()
   except sqlite3.Error:
     return
 
 
+def read_json_cached(path):
+  stat = path.stat()
+  key = (stat.st_mtime_ns, stat.st_size)
+  with json_file_cache_lock:
+    cached = json_file_cache.get(path)
+  if cached and cached[0] == key:
+    data = cached[1]
+  else:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    with json_file_cache_lock:
+      json_file_cache[path] = (key, data)
+  return copy(data) if isinstance(data, (dict, list)) else data
+
+
+def forget_json_cached(path):
+  with json_file_cache_lock:
+    json_file_cache.pop(path, None)
+
+
 def load_json_file(path, default=None):
   if default is None:
     default = {}
   try:
-    if not path.exists():
-      return deepcopy(default)
-    data = json.loads(path.read_text(encoding="utf-8"))
+    data = read_json_cached(path)
   except (OSError, json.JSONDecodeError):
     return deepcopy(default)
   return data if isinstance(data, type(default)) else deepcopy(default)
 
 
 def save_json_file(path, payload):
+  forget_json_cached(path)
   try:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(payload, ensure_ascii=True, indent=2), encoding="utf-8")
+    path.write_text(json.dumps(payload, ensure_ascii=True, separators=(",", ":")), encoding="utf-8")
     return True
   except OSError:
     return False
@@ -845,7 +1095,7 @@ def local_day_bounds(target_date=None):
 
 
 def iso_utc(value):
-  return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+  return value.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
 
 
 def http_json(url, timeout=20):
@@ -1142,6 +1392,15 @@ def send_daily_discord_summary(config, target_date=None, end_time=None):
   return True, ""
 
 
+def db_maintenance_loop(stop_event):
+  while not stop_event.wait(DB_OPTIMIZE_SECONDS):
+    try:
+      with log_lock:
+        db_connect().execute("PRAGMA optimize")
+    except sqlite3.Error as error:
+      log_event("error", f"Database optimize failed: {error}")
+
+
 def discord_summary_loop(config, stop_event):
   while not stop_event.is_set():
     try:
@@ -1178,29 +1437,21 @@ def discord_summary_loop(config, stop_event):
 
 
 def derive_last_detection(entries, config):
-  if not entries:
-    return None
-  icon_index = load_icon_index()
   latest = None
-  latest_dt = None
+  grouped = []
   for entry in entries:
     stamp = entry.get("timestamp")
-    dt = parse_timestamp(stamp)
-    if dt is None:
-      if latest_dt is None and stamp:
-        if latest is None or stamp > latest:
-          latest = stamp
+    if not stamp or not isinstance(stamp, str):
       continue
-    if latest_dt is None or dt > latest_dt:
-      latest_dt = dt
+    if latest is None or stamp > latest:
       latest = stamp
+      grouped = [entry]
+    elif stamp == latest:
+      grouped.append(entry)
 
-  if not latest:
-    return None
-
-  grouped = [entry for entry in entries if entry.get("timestamp") == latest]
-  if not grouped:
+  if not latest or not grouped:
     return None
+  icon_index = load_icon_index()
 
   def confidence_key(item):
     value = item.get("confidence")
@@ -1209,10 +1460,10 @@ def derive_last_detection(entries, config):
     except (TypeError, ValueError):
       return 0.0
 
-  grouped.sort(key=confidence_key, reverse=True)
+  grouped = heapq.nlargest(3, grouped, key=confidence_key)
   top = grouped[0]
   predictions = []
-  for entry in grouped[:3]:
+  for entry in grouped:
     predictions.append({
       "species": entry.get("species", "Unknown"),
       "scientific_name": entry.get("scientific_name", ""),
@@ -1233,17 +1484,11 @@ def derive_last_detection(entries, config):
 
 
 def refresh_last_detection(config):
-  entries = read_log(None)
-  latest = derive_last_detection(entries, config)
+  latest = derive_last_detection(read_latest_group(), config)
   with last_detection_lock:
     global last_detection
     last_detection = latest
-  payload = {}
-  if LATEST_PATH.exists():
-    try:
-      payload = json.loads(LATEST_PATH.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError):
-      payload = {}
+  payload = read_latest_payload()
   payload["last_detection"] = latest
   payload["last_heard"] = latest["timestamp"] if latest else None
   payload["log_revision"] = get_log_revision()
@@ -1264,7 +1509,7 @@ def record_last_detection(predictions, config):
     "scientific_name": top.get("scientific_name", ""),
     "confidence": top.get("confidence"),
     "clip_seconds": config.get("segment_seconds"),
-    "top_predictions": predictions,
+    "top_predictions": [dict(item) for item in predictions],
     "location": config.get("location", "Stream"),
     "icon_url": icon_url_for(top.get("species", "Unknown"), icon_index),
   }
@@ -1273,6 +1518,7 @@ def record_last_detection(predictions, config):
 
   log_timestamp = payload["timestamp"]
   entries = []
+  events = []
   for prediction in predictions:
     entry = {
       "id": uuid.uuid4().hex,
@@ -1287,15 +1533,17 @@ def record_last_detection(predictions, config):
     message = f"Detected {entry['species']}"
     if confidence_label:
       message = f"{message} ({confidence_label})"
-    log_event("detection", message, {
+    events.append(make_event("detection", message, {
       "species": entry["species"],
       "scientific_name": entry["scientific_name"],
       "confidence": entry.get("confidence"),
-    })
+    }))
+  append_event(events)
   append_log(entries)
+  times_heard = get_species_heard_count(payload.get("species"))
   with last_detection_lock:
     if last_detection and last_detection.get("species") == payload.get("species"):
-      last_detection["times_heard"] = get_species_heard_count(payload.get("species"))
+      last_detection = {**last_detection, "times_heard": times_heard}
 
 
 def append_log(entries):
@@ -1307,15 +1555,17 @@ def append_log(entries):
   for entry in entries:
     if "id" not in entry:
       entry["id"] = entry_id(entry)
+    stamp = str(entry.get("timestamp") or now_iso())
     payload.append(
       (
         entry["id"],
-        str(entry.get("timestamp") or now_iso()),
+        stamp,
         entry.get("species", "Unknown"),
         entry.get("scientific_name", ""),
         normalize_confidence(entry.get("confidence")),
         entry.get("location", ""),
-        json.dumps(entry, ensure_ascii=True),
+        extra_fields_json(entry),
+        timestamp_epoch(stamp),
       )
     )
   with log_lock:
@@ -1323,51 +1573,93 @@ def append_log(entries):
       connection.executemany(
         """
         INSERT OR REPLACE INTO detections
-        (id, timestamp, species, scientific_name, confidence, location, raw_json)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
+        (id, timestamp, species, scientific_name, confidence, location, raw_json, ts_epoch)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """,
         payload,
       )
+      connection.execute("DELETE FROM summary_cache WHERE cache_key = 'log_summary'")
       connection.commit()
-  update_species_set(entries)
-  update_species_counts(entries)
+  update_species_state(entries)
   bump_log_revision()
-  invalidate_summary_cache()
+  forget_summary_memo()
 
 
 def entry_id(entry):
   if entry.get("id"):
     return str(entry["id"])
   base = f"{entry.get('timestamp', '')}|{entry.get('species', '')}|{entry.get('confidence', '')}"
-  return hashlib.sha1(base.encode("utf-8")).hexdigest()[:12]
+  return hashlib.blake2b(base.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def extra_fields_json(entry):
+  if LOG_TYPED_FIELDS.issuperset(entry):
+    return ""
+  return json.dumps(entry, ensure_ascii=True, separators=(",", ":"))
+
+
+def log_entry_from_row(row):
+  entry = {}
+  # raw_json is "" unless the entry had fields beyond the typed columns.
+  if row["raw_json"]:
+    try:
+      extra = json.loads(row["raw_json"])
+    except json.JSONDecodeError:
+      extra = None
+    if isinstance(extra, dict):
+      entry = extra
+  entry.update(
+    id=row["id"],
+    timestamp=row["timestamp"],
+    species=row["species"],
+    scientific_name=row["scientific_name"],
+    confidence=row["confidence"],
+    location=row["location"],
+  )
+  return entry
 
 
 def read_log(limit=200):
-  if limit is not None and limit <= 0:
+  if limit is None:
+    return list(iter_log())
+  if limit <= 0:
     return []
-  query = "SELECT id, raw_json FROM detections ORDER BY timestamp DESC, rowid DESC"
-  params = []
-  if limit is not None:
-    query += " LIMIT ?"
-    params.append(int(limit))
   try:
-    with log_lock:
-      with db_connect() as connection:
-        rows = connection.execute(query, params).fetchall()
+    with db_connect() as connection:
+      rows = connection.execute(
+        f"SELECT {LOG_COLUMNS} FROM detections ORDER BY timestamp DESC, rowid DESC LIMIT ?",
+        (int(limit),),
+      ).fetchall()
   except sqlite3.Error:
     return []
-  output = []
-  for row in reversed(rows):
-    try:
-      entry = json.loads(row["raw_json"])
-    except (TypeError, json.JSONDecodeError):
-      entry = {
-        "id": row["id"],
-        "timestamp": "",
-      }
-    entry["id"] = entry_id(entry)
-    output.append(entry)
-  return output
+  return [log_entry_from_row(row) for row in reversed(rows)]
+
+
+def read_latest_group(limit=3):
+  try:
+    with db_connect() as connection:
+      rows = connection.execute(
+        f"""
+        SELECT {LOG_COLUMNS} FROM detections
+        WHERE timestamp = (SELECT MAX(timestamp) FROM detections)
+        ORDER BY confidence DESC, rowid ASC
+        LIMIT ?
+        """,
+        (int(limit),),
+      ).fetchall()
+  except sqlite3.Error:
+    return []
+  return [log_entry_from_row(row) for row in rows]
+
+
+def iter_log():
+  try:
+    with db_connect() as connection:
+      cursor = connection.execute(f"SELECT {LOG_COLUMNS} FROM detections ORDER BY timestamp ASC, rowid ASC")
+      for row in cursor:
+        yield log_entry_from_row(row)
+  except sqlite3.Error:
+    return
 
 
 def build_activity_curve(days=10):
@@ -1384,26 +1676,30 @@ def build_activity_curve(days=10):
   total_bins = 24 * bins_per_hour
   counts = [0] * total_bins
   today_counts = [0] * total_bins
-  cutoff_iso = cutoff.isoformat().replace("+00:00", "Z")
   try:
-    with log_lock:
-      with db_connect() as connection:
-        rows = connection.execute(
-          "SELECT timestamp FROM detections WHERE timestamp >= ? ORDER BY timestamp ASC",
-          (cutoff_iso,),
-        ).fetchall()
+    with db_connect() as connection:
+      rows = connection.execute(
+        """
+        SELECT
+          CAST(strftime('%H', ts_epoch, 'unixepoch', 'localtime') AS INTEGER) * ?
+            + CAST(strftime('%M', ts_epoch, 'unixepoch', 'localtime') AS INTEGER) / 30 AS bucket,
+          date(ts_epoch, 'unixepoch', 'localtime') = ? AS is_today,
+          COUNT(1) AS heard_count
+        FROM detections
+        WHERE ts_epoch >= ?
+        GROUP BY bucket, is_today
+        """,
+        (bins_per_hour, today_local.isoformat(), int(cutoff.timestamp())),
+      ).fetchall()
   except sqlite3.Error:
     return {"points": counts, "today_points": today_counts, "days": days}
   for row in rows:
-    dt = parse_timestamp(row["timestamp"])
-    if not dt:
+    bucket = row["bucket"]
+    if bucket is None or not 0 <= bucket < total_bins:
       continue
-    local_dt = dt.astimezone()
-    half_hour = local_dt.minute // 30
-    bucket = (local_dt.hour * bins_per_hour) + half_hour
-    counts[bucket] += 1
-    if local_dt.date() == today_local:
-      today_counts[bucket] += 1
+    counts[bucket] += row["heard_count"]
+    if row["is_today"]:
+      today_counts[bucket] += row["heard_count"]
   avg = [round(value / days, 2) for value in counts]
   current_hour = local_now.hour + (local_now.minute / 60.0) + (local_now.second / 3600.0)
   current_bin_index = int(current_hour * bins_per_hour)
@@ -1463,35 +1759,66 @@ def build_log_csv(entries):
       entry.get("location", ""),
       entry.get("id", ""),
     ])
-  return output.getvalue()
+    if output.tell() >= CSV_CHUNK_CHARS:
+      yield output.getvalue()
+      output.seek(0)
+      output.truncate()
+  yield output.getvalue()
 
 
-def count_pending_segments():
+def is_segment_name(name):
+  return name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+
+
+def list_segment_entries():
+  with os.scandir(TMP_DIR) as entries:
+    return [entry for entry in entries if is_segment_name(entry.name)]
+
+
+def scan_segments():
+  global segment_scan
+  now = time.monotonic()
+  with segment_scan_lock:
+    if segment_scan and now - segment_scan[0] < SEGMENT_SCAN_TTL_SECONDS:
+      return segment_scan[1], segment_scan[2]
+  count = 0
+  max_mtime = None
   try:
-    if not TMP_DIR.exists():
-      return 0
-    return len(list(TMP_DIR.glob("segment_*.wav")))
+    for entry in list_segment_entries():
+      count += 1
+      try:
+        mtime = entry.stat().st_mtime
+      except OSError:
+        continue
+      if max_mtime is None or mtime > max_mtime:
+        max_mtime = mtime
   except OSError:
-    return 0
+    return 0, None
+  with segment_scan_lock:
+    segment_scan = (now, count, max_mtime)
+  return count, max_mtime
+
+
+def count_pending_segments():
+  return scan_segments()[0]
 
 
 def slugify(value):
-  text = re.sub(r"[^a-zA-Z0-9]+", "-", value.strip().lower())
+  text = SLUG_PATTERN.sub("-", value.strip().lower())
   return text.strip("-") or "unknown"
 
 
 def load_clip_index():
-  if not CLIP_INDEX_PATH.exists():
-    return {}
   try:
-    data = json.loads(CLIP_INDEX_PATH.read_text(encoding="utf-8"))
+    data = read_json_cached(CLIP_INDEX_PATH)
   except (OSError, json.JSONDecodeError):
     return {}
   return data if isinstance(data, dict) else {}
 
 
 def save_clip_index(index):
-  CLIP_INDEX_PATH.write_text(json.dumps(index, ensure_ascii=True, indent=2), encoding="utf-8")
+  forget_json_cached(CLIP_INDEX_PATH)
+  CLIP_INDEX_PATH.write_text(json.dumps(index, ensure_ascii=True, separators=(",", ":")), encoding="utf-8")
   invalidate_summary_cache()
 
 
@@ -1499,7 +1826,28 @@ def normalize_species_key(value):
   return str(value or "").strip().lower()
 
 
+def forget_icon_index():
+  global icon_index_cache, icon_index_generation
+  with icon_index_lock:
+    icon_index_cache = None
+    icon_index_generation += 1
+
+
+def icons_dir_stamp():
+  try:
+    return ICONS_DIR.stat().st_mtime_ns
+  except OSError:
+    return None
+
+
 def load_icon_index():
+  global icon_index_cache
+  stamp = icons_dir_stamp()
+  with icon_index_lock:
+    cached = icon_index_cache
+    generation = icon_index_generation
+  if cached is not None and cached[0] == stamp:
+    return cached[1]
   try:
     with db_connect() as connection:
       rows = connection.execute("SELECT species_key, filename FROM species_icons").fetchall()
@@ -1509,8 +1857,11 @@ def load_icon_index():
   for row in rows:
     key = str(row["species_key"] or "").strip().lower()
     filename = str(row["filename"] or "").strip()
-    if key and filename:
-      index[key] = filename
+    if key and filename and (ICONS_DIR / filename).exists():
+      index[key] = f"/data/icons/{filename}"
+  with icon_index_lock:
+    if generation == icon_index_generation:
+      icon_index_cache = (stamp, index)
   return index
 
 
@@ -1538,6 +1889,8 @@ def save_icon_index(index):
       connection.commit()
   except sqlite3.Error:
     return
+  finally:
+    forget_icon_index()
 
 
 def icon_url_for(species, icon_index=None):
@@ -1546,26 +1899,127 @@ def icon_url_for(species, icon_index=None):
     return ""
   if icon_index is None:
     icon_index = load_icon_index()
-  filename = icon_index.get(key)
-  if not filename:
-    return ""
-  if not (ICONS_DIR / filename).exists():
-    return ""
-  return f"/data/icons/{filename}"
+  return icon_index.get(key, "")
 
 
-def save_species_icon(species, payload):
+def header_param(header, value, param):
+  message = Message()
+  message[header] = value
+  found = message.get_param(param, header=header)
+  return None if found is None else str(found)
+
+
+def read_multipart_form(stream, content_type, length):
+  boundary = header_param("Content-Type", content_type, "boundary")
+  if not boundary or length <= 0:
+    return None
+  delimiter = b"\r\n--" + boundary.encode("latin-1")
+  fields = {}
+  files = {}
+  complete = False
+  try:
+    complete = read_multipart_parts(stream, delimiter, length, fields, files)
+  finally:
+    if not complete:
+      for handle in files.values():
+        handle.close()
+  if not complete:
+    return None
+  for handle in files.values():
+    handle.seek(0)
+  return {name: value.getvalue() for name, value in fields.items()}, files
+
+
+def read_multipart_parts(stream, delimiter, length, fields, files):
+  keep = len(delimiter)
+  part = None
+  part_limit = 0
+  state = "preamble"
+  # Treat the first boundary like the later ones, which all follow a CRLF.
+  buffer = b"\r\n"
+  remaining = length
+  while True:
+    if remaining > 0:
+      chunk = stream.read(min(MULTIPART_CHUNK_BYTES, remaining))
+      if not chunk:
+        remaining = 0
+      else:
+        remaining -= len(chunk)
+        buffer += chunk
+    at_end = remaining <= 0
+    while True:
+      if state in {"preamble", "body"}:
+        index = buffer.find(delimiter)
+        if index < 0:
+          # Hold back enough bytes to catch a delimiter split across reads.
+          if len(buffer) > keep:
+            if state == "body":
+              part_limit -= len(buffer) - keep
+              if part_limit < 0:
+                return False
+              if part is not None:
+                part.write(buffer[:-keep])
+            buffer = buffer[-keep:]
+          break
+        if state == "body":
+          part_limit -= index
+          if part_limit < 0:
+            return False
+          if part is not None:
+            part.write(buffer[:index])
+        buffer = buffer[index + len(delimiter):]
+        state = "delimiter"
+      if state == "delimiter":
+        if len(buffer) < 2:
+          break
+        if buffer.startswith(b"--"):
+          return True
+        if not buffer.startswith(b"\r\n"):
+          return False
+        buffer = buffer[2:]
+        state = "headers"
+      if state == "headers":
+        index = buffer.find(b"\r\n\r\n")
+        if index < 0:
+          if len(buffer) > MULTIPART_FIELD_BYTES:
+            return False
+          break
+        headers = {}
+        for line in buffer[:index].decode("utf-8", "replace").split("\r\n"):
+          key, _, value = line.partition(":")
+          headers[key.strip().lower()] = value.strip()
+        buffer = buffer[index + 4:]
+        disposition = headers.get("content-disposition", "")
+        name = header_param("Content-Disposition", disposition, "name") or ""
+        part = None
+        if header_param("Content-Disposition", disposition, "filename") is None:
+          part_limit = MULTIPART_FIELD_BYTES
+          if name not in fields:
+            part = fields[name] = io.BytesIO()
+        else:
+          part_limit = MAX_ICON_UPLOAD_BYTES
+          if name not in files:
+            part = files[name] = tempfile.SpooledTemporaryFile(max_size=MULTIPART_CHUNK_BYTES * 4)
+        state = "body"
+    if at_end:
+      return False
+
+
+def save_species_icon(species, source):
   species_name = str(species or "").strip()
   if not species_name:
     return "", "Species is required"
-  if not payload:
+  header = source.read(len(PNG_SIGNATURE))
+  if not header:
     return "", "Icon file missing"
-  if not payload.startswith(b"\x89PNG\r\n\x1a\n"):
+  if header != PNG_SIGNATURE:
     return "", "Icon must be a PNG file"
   ICONS_DIR.mkdir(parents=True, exist_ok=True)
   filename = f"{slugify(species_name)}.png"
   try:
-    (ICONS_DIR / filename).write_bytes(payload)
+    with (ICONS_DIR / filename).open("wb") as handle:
+      handle.write(header)
+      shutil.copyfileobj(source, handle, MULTIPART_CHUNK_BYTES)
   except OSError:
     return "", "Unable to save icon"
   try:
@@ -1581,6 +2035,8 @@ def save_species_icon(species, payload):
       connection.commit()
   except sqlite3.Error:
     return "", "Unable to save icon mapping"
+  finally:
+    forget_icon_index()
   return f"/data/icons/{filename}", ""
 
 
@@ -1602,6 +2058,8 @@ def remove_species_icon(species):
       connection.commit()
   except sqlite3.Error:
     return False
+  finally:
+    forget_icon_index()
   if filename:
     try:
       (ICONS_DIR / filename).unlink(missing_ok=True)
@@ -1631,22 +2089,21 @@ def compute_snr_db(path):
       if rate <= 0:
         return None
       window_frames = max(1, int(rate * 0.2))
-      rms_values = []
-      while True:
-        frames = wav.readframes(window_frames)
-        if not frames:
-          break
-        if channels > 1:
-          frames = audioop.tomono(frames, sample_width, 0.5, 0.5)
-        rms = audioop.rms(frames, sample_width)
-        rms_values.append(rms)
+      frames = wav.readframes(wav.getnframes())
   except (OSError, wave.Error):
     return None
+  if channels > 1:
+    frames = audioop.tomono(frames, sample_width, 0.5, 0.5)
+  view = memoryview(frames)
+  window_bytes = window_frames * sample_width
+  rms_values = [
+    audioop.rms(view[offset:offset + window_bytes], sample_width)
+    for offset in range(0, len(view), window_bytes)
+  ]
   if not rms_values:
     return None
-  rms_values.sort()
   noise_count = max(1, int(len(rms_values) * 0.1))
-  noise_floor = sum(rms_values[:noise_count]) / noise_count
+  noise_floor = sum(heapq.nsmallest(noise_count, rms_values)) / noise_count
   signal_level = sum(rms_values) / len(rms_values)
   if noise_floor <= 0 or signal_level <= 0:
     return None
@@ -1654,35 +2111,58 @@ def compute_snr_db(path):
   return round(snr, 2)
 
 
-def update_best_clips(segment_path, predictions):
+def copy_segment_file(source, target):
+  if not hasattr(os, "copy_file_range"):
+    shutil.copy2(source, target)
+    return
+  try:
+    with open(source, "rb") as src, open(target, "wb") as dst:
+      src_fd = src.fileno()
+      dst_fd = dst.fileno()
+      remaining = os.fstat(src_fd).st_size
+      while remaining > 0:
+        copied = os.copy_file_range(src_fd, dst_fd, remaining)
+        if copied <= 0:
+          break
+        remaining -= copied
+    if remaining > 0:
+      raise OSError("short copy")
+  except OSError:
+    shutil.copy2(source, target)
+    return
+  shutil.copystat(source, target)
+
+
+def update_best_clips(segment_path, predictions, snr_db=None):
   if not predictions:
     return
   CLIPS_DIR.mkdir(parents=True, exist_ok=True)
   index = load_clip_index()
   updated = False
+  if snr_db is None:
+    snr_db = compute_snr_db(segment_path)
   for prediction in predictions:
     species = prediction.get("species", "Unknown") or "Unknown"
     confidence = prediction.get("confidence")
     normalized_confidence = normalize_confidence(confidence)
     confidence_value = normalized_confidence if normalized_confidence is not None else -1.0
-    snr_db = compute_snr_db(segment_path)
-    score = compute_clip_score(confidence_value, snr_db)
     entry = index.get(species, {})
     existing_normalized = normalize_confidence(entry.get("confidence"))
     existing_conf = existing_normalized if existing_normalized is not None else -1.0
+    if confidence_value + 0.02 < existing_conf:
+      continue
+    score = compute_clip_score(confidence_value, snr_db)
     existing_snr = entry.get("snr_db")
     try:
       existing_score = float(entry.get("score"))
     except (TypeError, ValueError):
       existing_score = compute_clip_score(existing_conf, existing_snr)
-    if confidence_value + 0.02 < existing_conf:
-      continue
     if score <= existing_score:
       continue
     filename = f"{slugify(species)}.wav"
     target = CLIPS_DIR / filename
     try:
-      shutil.copy2(segment_path, target)
+      copy_segment_file(segment_path, target)
     except OSError:
       continue
     index[species] = {
@@ -1699,7 +2179,7 @@ def update_best_clips(segment_path, predictions):
     save_clip_index(index)
 
 
-def update_daily_best_clip(segment_path, predictions):
+def update_daily_best_clip(segment_path, predictions, snr_db=None):
   if not predictions:
     return
   DAILY_BEST_DIR.mkdir(parents=True, exist_ok=True)
@@ -1714,7 +2194,8 @@ def update_daily_best_clip(segment_path, predictions):
   best_prediction = None
   best_score = current_score
   best_snr = None
-  snr_db = compute_snr_db(segment_path)
+  if snr_db is None:
+    snr_db = compute_snr_db(segment_path)
   for prediction in predictions:
     confidence = normalize_confidence(prediction.get("confidence"))
     confidence_value = confidence if confidence is not None else -1.0
@@ -1731,7 +2212,7 @@ def update_daily_best_clip(segment_path, predictions):
   filename = f"{day_key.isoformat()}-best.wav"
   target = DAILY_BEST_DIR / filename
   try:
-    shutil.copy2(segment_path, target)
+    copy_segment_file(segment_path, target)
   except OSError:
     return
 
@@ -1751,62 +2232,55 @@ def summarize_log():
   cached = get_cached_summary()
   if cached is not None:
     return cached
-  entries_all = read_log(None)
-  if not entries_all:
-    payload = {"entries": [], "species_count": 0, "total_detections": 0, "log_revision": get_log_revision()}
-    set_cached_summary(payload)
-    return payload
   days = 30
   local_now = datetime.now(timezone.utc).astimezone()
   start_date = local_now.date() - timedelta(days=days - 1)
-  date_index = {start_date + timedelta(days=idx): idx for idx in range(days)}
+  date_index = {(start_date + timedelta(days=idx)).isoformat(): idx for idx in range(days)}
+  start_epoch = int(datetime.combine(start_date, datetime.min.time()).astimezone().timestamp())
   icon_index = load_icon_index()
+  species_key = "COALESCE(NULLIF(species, ''), 'Unknown')"
+  try:
+    with db_connect() as connection:
+      latest_rows = connection.execute(
+        f"""
+        SELECT {LOG_COLUMNS}, species_key, heard_count FROM (
+          SELECT {LOG_COLUMNS}, {species_key} AS species_key,
+            COUNT(1) OVER (PARTITION BY {species_key}) AS heard_count,
+            ROW_NUMBER() OVER (
+              PARTITION BY {species_key}
+              ORDER BY timestamp DESC, COALESCE(NULLIF(confidence, 0), -1.0) DESC, rowid ASC
+            ) AS position
+          FROM detections
+        )
+        WHERE position = 1
+        """
+      ).fetchall()
+      daily_rows = connection.execute(
+        f"""
+        SELECT {species_key} AS species_key, date(ts_epoch, 'unixepoch', 'localtime') AS day,
+          COUNT(1) AS heard_count
+        FROM detections
+        WHERE ts_epoch >= ?
+        GROUP BY species_key, day
+        """,
+        (start_epoch,),
+      ).fetchall()
+  except sqlite3.Error:
+    return {"entries": [], "species_count": 0, "total_detections": 0, "log_revision": get_log_revision()}
   summary = {}
-  total = len(entries_all)
-  for entry in entries_all:
-    species = entry.get("species", "Unknown") or "Unknown"
-    item = summary.get(species)
-    dt = parse_timestamp(entry.get("timestamp"))
-    daily_index = None
-    if dt:
-      local_dt = dt.astimezone()
-      daily_index = date_index.get(local_dt.date())
-    current_time = dt.timestamp() if dt else None
-    current_raw = entry.get("timestamp", "") or ""
-    current_conf = normalize_confidence(entry.get("confidence")) or -1.0
-
-    if not item:
-      summary[species] = {
-        "count": 1,
-        "latest_entry": entry,
-        "latest_time": current_time,
-        "latest_raw": current_raw,
-        "latest_conf": current_conf,
-        "daily_counts": [0] * days,
-      }
-      if daily_index is not None:
-        summary[species]["daily_counts"][daily_index] += 1
-      continue
-
-    item["count"] += 1
-    if daily_index is not None:
-      item["daily_counts"][daily_index] += 1
-    latest_time = item["latest_time"]
-    replace = False
-    if current_time is not None and (latest_time is None or current_time > latest_time):
-      replace = True
-    elif current_time is None and latest_time is None:
-      if current_raw > item["latest_raw"]:
-        replace = True
-    elif current_time is not None and latest_time is not None and current_time == latest_time:
-      if current_conf > item["latest_conf"]:
-        replace = True
-
-    if replace:
-      item["latest_entry"] = entry
-      item["latest_time"] = current_time
-      item["latest_raw"] = current_raw
-      item["latest_conf"] = current_conf
+  total = 0
+  for row in latest_rows:
+    total += row["heard_count"]
+    summary[row["species_key"]] = {
+      "count": row["heard_count"],
+      "latest_entry": log_entry_from_row(row),
+      "daily_counts": [0] * days,
+    }
+  for row in daily_rows:
+    item = summary.get(row["species_key"])
+    daily_index = date_index.get(row["day"])
+    if item and daily_index is not None:
+      item["daily_counts"][daily_index] += row["heard_count"]
 
   clip_index = load_clip_index()
   entries = []
@@ -1814,7 +2288,6 @@ def summarize_log():
     latest_entry = dict(item["latest_entry"])
     latest_entry["species"] = latest_entry.get("species", species) or species
     latest_entry["count"] = item["count"]
-    latest_entry["id"] = entry_id(latest_entry)
     latest_entry["daily_counts"] = item.get("daily_counts", [])
     latest_entry["icon_url"] = icon_url_for(latest_entry.get("species"), icon_index)
     clip = clip_index.get(species)
@@ -1823,12 +2296,13 @@ def summarize_log():
       latest_entry["clip_confidence"] = clip.get("confidence")
     entries.append(latest_entry)
 
-  with species_count_lock:
-    global species_counts
-    species_counts = {species: item["count"] for species, item in summary.items()}
+  new_counts = {species: item["count"] for species, item in summary.items()}
+  new_set = set(new_counts)
   with species_lock:
-    global species_set
-    species_set = set(summary.keys())
+    global species_set, species_counts, species_ranks
+    species_counts = new_counts
+    species_set = new_set
+    species_ranks = None
 
   payload = {
     "entries": entries,
@@ -1846,16 +2320,18 @@ def delete_log_entry(entry_key):
   with log_lock:
     try:
       with db_connect() as connection:
+        row = connection.execute("SELECT species FROM detections WHERE id = ?", (str(entry_key),)).fetchone()
         cursor = connection.execute("DELETE FROM detections WHERE id = ?", (str(entry_key),))
         removed = cursor.rowcount > 0
+        if removed:
+          connection.execute("DELETE FROM summary_cache WHERE cache_key = 'log_summary'")
         connection.commit()
     except sqlite3.Error:
       return False
   if removed:
-    rebuild_species_set()
-    rebuild_species_counts()
+    discard_species_entry(row["species"] if row else None)
     bump_log_revision()
-    invalidate_summary_cache()
+    forget_summary_memo()
   return removed
 
 
@@ -1865,6 +2341,7 @@ def append_event(entries):
   if isinstance(entries, dict):
     entries = [entries]
   payload = []
+  dumps = json.dumps
   for entry in entries:
     if "id" not in entry:
       entry["id"] = event_id(entry)
@@ -1874,7 +2351,7 @@ def append_event(entries):
         str(entry.get("timestamp") or now_iso()),
         entry.get("type", ""),
         entry.get("message", ""),
-        json.dumps(entry, ensure_ascii=True),
+        dumps(entry, ensure_ascii=True, separators=(",", ":")),
       )
     )
   with event_lock:
@@ -1894,35 +2371,43 @@ def event_id(entry):
   if entry.get("id"):
     return str(entry["id"])
   base = f"{entry.get('timestamp', '')}|{entry.get('type', '')}|{entry.get('message', '')}"
-  return hashlib.sha1(base.encode("utf-8")).hexdigest()[:12]
+  return hashlib.blake2b(base.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def event_entry_from_row(row):
+  try:
+    entry = json.loads(row["raw_json"])
+  except (TypeError, json.JSONDecodeError):
+    entry = {"id": row["id"], "timestamp": "", "type": "", "message": ""}
+  if not entry.get("id"):
+    entry["id"] = row["id"]
+  return entry
 
 
 def read_events(limit=200):
   if limit is not None and limit <= 0:
     return []
-  query = "SELECT id, raw_json FROM events ORDER BY timestamp DESC, rowid DESC"
-  params = []
-  if limit is not None:
-    query += " LIMIT ?"
-    params.append(int(limit))
+  if limit is None:
+    query = "SELECT id, raw_json FROM events ORDER BY timestamp ASC, rowid ASC"
+    params = ()
+  else:
+    query = """
+      SELECT id, raw_json FROM (
+        SELECT id, raw_json, timestamp, rowid AS row_order FROM events
+        ORDER BY timestamp DESC, rowid DESC
+        LIMIT ?
+      )
+      ORDER BY timestamp ASC, row_order ASC
+    """
+    params = (int(limit),)
   try:
-    with event_lock:
-      with db_connect() as connection:
-        rows = connection.execute(query, params).fetchall()
+    with db_connect() as connection:
+      return [event_entry_from_row(row) for row in connection.execute(query, params)]
   except sqlite3.Error:
     return []
-  output = []
-  for row in reversed(rows):
-    try:
-      entry = json.loads(row["raw_json"])
-    except (TypeError, json.JSONDecodeError):
-      entry = {"id": row["id"], "timestamp": "", "type": "", "message": ""}
-    entry["id"] = event_id(entry)
-    output.append(entry)
-  return output
 
 
-def log_event(event_type, message, extra=None):
+def make_event(event_type, message, extra=None):
   entry = {
     "id": uuid.uuid4().hex,
     "timestamp": now_iso(),
@@ -1931,7 +2416,66 @@ def log_event(event_type, message, extra=None):
   }
   if extra:
     entry.update(extra)
-  append_event(entry)
+  return entry
+
+
+def log_event(event_type, message, extra=None):
+  ensure_event_writer()
+  event_queue.put(make_event(event_type, message, extra))
+
+
+def ensure_event_writer():
+  global event_writer_thread
+  with event_writer_lock:
+    if event_writer_thread and event_writer_thread.is_alive():
+      return
+    event_writer_thread = threading.Thread(target=event_writer_loop, daemon=True)
+    event_writer_thread.start()
+
+
+def event_writer_loop():
+  while True:
+    batch = [event_queue.get()]
+    deadline = time.monotonic() + EVENT_FLUSH_SECONDS
+    while len(batch) < EVENT_BATCH_SIZE:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        break
+      try:
+        batch.append(event_queue.get(timeout=remaining))
+      except queue.Empty:
+        break
+    write_event_batch(batch)
+
+
+def write_event_batch(batch):
+  # Events cannot be logged through log_event from here, so failures go to stderr.
+  try:
+    try:
+      append_event(batch)
+      return
+    except Exception as error:
+      sys.stderr.write(f"Event write failed ({len(batch)} events), retrying: {error}\n")
+    for entry in batch:
+      try:
+        append_event(entry)
+      except Exception as error:
+        sys.stderr.write(f"Dropped event {entry.get('type', '')}: {entry.get('message', '')} ({error})\n")
+  finally:
+    for _ in batch:
+      event_queue.task_done()
+
+
+def flush_pending_writes():
+  batch = []
+  while True:
+    try:
+      batch.append(event_queue.get_nowait())
+    except queue.Empty:
+      break
+  if batch:
+    write_event_batch(batch)
+  event_queue.join()
 
 
 def format_confidence(value):
@@ -1973,7 +2517,7 @@ def normalize_timestamp(value):
     parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
   except ValueError:
     return now_iso()
-  return parsed.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+  return iso_utc(parsed)
 
 
 def add_manual_log_entry(data, config):
@@ -2018,7 +2562,7 @@ def list_audio_inputs():
       continue
     if not in_audio:
       continue
-    match = re.search(r"\[(\d+)\]\s(.+)$", line)
+    match = AUDIO_DEVICE_PATTERN.search(line)
     if not match:
       continue
     index, name = match.groups()
@@ -2026,38 +2570,59 @@ def list_audio_inputs():
   return devices, None
 
 
-def is_file_ready(path):
-  try:
-    age = time.time() - path.stat().st_mtime
-  except OSError:
-    return False
-  return age > 0.4
+def is_file_ready(path, mtime=None):
+  if mtime is None:
+    try:
+      mtime = path.stat().st_mtime
+    except OSError:
+      return False
+  return time.time() - mtime > 0.4
 
 
 def latest_segment_mtime():
-  try:
-    files = list(TMP_DIR.glob("segment_*.wav"))
-  except OSError:
-    return None
-  if not files:
-    return None
-  try:
-    return max(path.stat().st_mtime for path in files)
-  except OSError:
-    return None
+  return scan_segments()[1]
 
 
 def resolve_ffmpeg_path():
+  global ffmpeg_path_cache
+  if ffmpeg_path_cache:
+    return ffmpeg_path_cache
   resolved = shutil.which("ffmpeg")
-  if resolved:
-    return resolved
-  for candidate in FALLBACK_FFMPEG_PATHS:
-    if Path(candidate).exists():
-      return candidate
-  return None
+  if not resolved:
+    resolved = next((candidate for candidate in FALLBACK_FFMPEG_PATHS if Path(candidate).exists()), None)
+  ffmpeg_path_cache = resolved
+  return resolved
+
+
+def forget_ffmpeg_path():
+  global ffmpeg_path_cache
+  ffmpeg_path_cache = None
+
+
+def _list_proc_ffmpeg_processes():
+  processes = []
+  with os.scandir("/proc") as entries:
+    for entry in entries:
+      if not entry.name.isdigit():
+        continue
+      try:
+        with open(f"/proc/{entry.name}/cmdline", "rb") as handle:
+          raw = handle.read()
+      except OSError:
+        continue
+      if b"ffmpeg" not in raw:
+        continue
+      command = raw.rstrip(b"\0").replace(b"\0", b" ").decode("utf-8", "replace")
+      processes.append((int(entry.name), command))
+  return processes
 
 
 def _list_ffmpeg_processes():
+  if os.path.isdir("/proc/self"):
+    try:
+      return _list_proc_ffmpeg_processes()
+    except OSError:
+      pass
   processes = []
   try:
     result = subprocess.run(
@@ -2112,7 +2677,7 @@ def set_current_capture_pid(pid):
 
 
 def cleanup_capture_processes(reason, allowed_pids=None):
-  marker = str(TMP_DIR / "segment_")
+  marker = str(TMP_DIR / SEGMENT_PREFIX)
   candidates = []
   for pid, command in _list_ffmpeg_processes():
     if marker in command:
@@ -2145,11 +2710,47 @@ def cleanup_capture_processes(reason, allowed_pids=None):
   return len(candidates)
 
 
+def notify_segment_ready(path):
+  global last_segment_notice
+  with segment_notice_cv:
+    segment_notices.append(path)
+    last_segment_notice = time.time()
+    segment_notice_cv.notify_all()
+
+
+def get_last_segment_notice():
+  with segment_notice_cv:
+    return last_segment_notice
+
+
+def take_ready_segments(timeout=0.0):
+  with segment_notice_cv:
+    if timeout > 0:
+      segment_notice_cv.wait_for(lambda: segment_notices, timeout)
+    paths = list(segment_notices)
+    segment_notices.clear()
+  return paths
+
+
+def watch_segment_list(process):
+  try:
+    for line in process.stdout:
+      name = line.strip()
+      if name:
+        notify_segment_ready(TMP_DIR / Path(name).name)
+  except (OSError, ValueError):
+    return
+
+
 def clear_tmp_segments(reason):
   removed = 0
-  for path in TMP_DIR.glob("segment_*.wav"):
+  try:
+    entries = list_segment_entries()
+  except OSError:
+    entries = []
+  for entry in entries:
     try:
-      path.unlink()
+      os.unlink(entry.path)
       removed += 1
     except OSError:
       continue
@@ -2173,69 +2774,95 @@ def analyze_audio_activity(path, threshold_db, min_active_seconds):
         return False, None
 
       chunk_frames = max(1, int(sample_rate * 0.05))
-      active_frames = 0
-      max_db = -120.0
+      peak_rms = 0
       max_amp = float(1 << (8 * sample_width - 1))
-
-      while True:
-        chunk = handle.readframes(chunk_frames)
-        if not chunk:
-          break
-        rms = audioop.rms(chunk, sample_width)
-        if rms <= 0 or max_amp <= 0:
-          db = -120.0
-        else:
-          db = 20.0 * math.log10(rms / max_amp)
-        if db > max_db:
-          max_db = db
-        if db >= threshold_db:
-          frames_in_chunk = len(chunk) // (sample_width * channels)
-          active_frames += frames_in_chunk
-          if (active_frames / sample_rate) >= min_active_seconds:
-            return True, max_db
-
-      return False, max_db
+      threshold_rms = max_amp * (10.0 ** (threshold_db / 20.0))
+      silence_is_active = threshold_db <= -120.0
+
+      def peak_db():
+        if peak_rms <= 0:
+          return -120.0
+        return max(-120.0, 20.0 * math.log10(peak_rms / max_amp))
+
+      frames = memoryview(handle.readframes(total_frames))
+      frame_bytes = sample_width * channels
+      chunk_bytes = chunk_frames * frame_bytes
+      needed_bytes = min_active_seconds * sample_rate * frame_bytes
+      active_bytes = 0
+      rms_of = audioop.rms
+      for offset in range(0, len(frames), chunk_bytes):
+        chunk = frames[offset:offset + chunk_bytes]
+        rms = rms_of(chunk, sample_width)
+        if rms > peak_rms:
+          peak_rms = rms
+        if (rms >= threshold_rms) if rms > 0 else silence_is_active:
+          active_bytes += len(chunk)
+          if active_bytes >= needed_bytes:
+            return True, peak_db()
+
+      return False, peak_db()
   except (wave.Error, OSError, EOFError):
     return True, None
 
 
+@functools.lru_cache(maxsize=256)
 def normalize_header(value):
   return value.strip().lower().replace("_", " ")
 
 
+def prediction_confidence(item):
+  return item["confidence"]
+
+
+@functools.lru_cache(maxsize=16)
+def prediction_columns(header):
+  header_map = {normalize_header(name): index for index, name in enumerate(header)}
+
+  def pick(*options):
+    for option in options:
+      key = normalize_header(option)
+      if key in header_map:
+        return header_map[key]
+    return None
+
+  return (
+    pick("common name", "common_name", "species"),
+    pick("scientific name", "scientific_name"),
+    pick("confidence", "score", "probability"),
+  )
+
+
 def extract_predictions(csv_path):
   predictions = []
   with csv_path.open("r", encoding="utf-8", newline="") as handle:
-    reader = csv.DictReader(handle)
-    if not reader.fieldnames:
+    reader = csv.reader(handle)
+    header = next(reader, None)
+    if not header:
+      return predictions
+    common_index, scientific_index, confidence_index = prediction_columns(tuple(header))
+    if confidence_index is None:
       return predictions
-    header_map = {normalize_header(name): name for name in reader.fieldnames}
-
-    def pick(*options):
-      for option in options:
-        key = normalize_header(option)
-        if key in header_map:
-          return header_map[key]
-      return None
 
-    common_key = pick("common name", "common_name", "species")
-    scientific_key = pick("scientific name", "scientific_name")
-    confidence_key = pick("confidence", "score", "probability")
+    def column(row, index):
+      if index is None or index >= len(row):
+        return ""
+      return row[index].strip()
 
     for row in reader:
-      if not row:
+      if len(row) <= confidence_index:
         continue
       try:
-        confidence = float(row.get(confidence_key, ""))
-      except (TypeError, ValueError):
+        confidence = float(row[confidence_index])
+      except ValueError:
+        continue
+      if confidence < ANALYSIS_MIN_CONF:
         continue
       predictions.append({
-        "species": (row.get(common_key) or "").strip() or "Unknown",
-        "scientific_name": (row.get(scientific_key) or "").strip(),
+        "species": column(row, common_index) or "Unknown",
+        "scientific_name": column(row, scientific_index),
         "confidence": confidence,
       })
 
-  predictions.sort(key=lambda item: item.get("confidence", 0), reverse=True)
   return predictions
 
 
@@ -2288,7 +2915,8 @@ def run_birdnet(template, workdir, input_path, output_target, min_confidence, se
     result = subprocess.run(
       command,
       cwd=workdir or None,
-      capture_output=True,
+      stdout=subprocess.DEVNULL,
+      stderr=subprocess.PIPE,
       text=True,
       check=False,
       timeout=60,
@@ -2339,7 +2967,16 @@ def build_ffmpeg_command(config, ffmpeg_path):
       scheme = urlsplit(stream_url).scheme.lower()
     except ValueError:
       scheme = ""
-    input_args = []
+    input_args = [
+      "-fflags",
+      "nobuffer",
+      "-flags",
+      "low_delay",
+      "-analyzeduration",
+      "2000000",
+      "-probesize",
+      "500000",
+    ]
     if scheme == "rtsp":
       input_args.extend(["-rtsp_transport", "tcp"])
     input_args = [
@@ -2355,6 +2992,7 @@ def build_ffmpeg_command(config, ffmpeg_path):
     "-loglevel",
     "warning",
     "-hide_banner",
+    "-nostdin",
     "-y",
     *input_args,
     "-vn",
@@ -2368,7 +3006,11 @@ def build_ffmpeg_command(config, ffmpeg_path):
     str(config.get("segment_seconds", 3)),
     "-reset_timestamps",
     "1",
-    str(TMP_DIR / "segment_%06d.wav"),
+    "-segment_list",
+    "pipe:1",
+    "-segment_list_type",
+    "flat",
+    str(TMP_DIR / f"{SEGMENT_PREFIX}%06d{SEGMENT_SUFFIX}"),
   ]
   return command, None
 
@@ -2423,15 +3065,14 @@ def analyze_segment(path, config):
         analysis_last_error = error
   else:
     report_threshold = snapshot.get("min_confidence", 0.0)
-    above = [item for item in predictions if item.get("confidence", 0) >= report_threshold]
-    below = [item for item in predictions if item.get("confidence", 0) < report_threshold]
-    above = above[:3]
-    below = below[:3]
+    above = heapq.nlargest(3, (item for item in predictions if item["confidence"] >= report_threshold), key=prediction_confidence)
+    below = heapq.nlargest(3, (item for item in predictions if item["confidence"] < report_threshold), key=prediction_confidence)
     status_message = "Detected" if above else "No detections"
     if above:
       record_last_detection(above, snapshot)
-      update_best_clips(path, above)
-      update_daily_best_clip(path, above)
+      snr_db = compute_snr_db(path)
+      update_best_clips(path, above, snr_db)
+      update_daily_best_clip(path, above, snr_db)
     else:
       threshold_label = format_confidence(report_threshold)
       if threshold_label:
@@ -2469,24 +3110,19 @@ def process_loop(config, stop_event):
   paths_lock = threading.Lock()
   last_status_report = 0.0
   last_status_payload = None
-  last_worker_check = 0.0
   drop_log_state = {"backlog": 0.0, "stale": 0.0}
 
   def gate_worker(worker_id):
-    while not stop_event.is_set():
-      try:
-        path = gate_queue.get(timeout=0.5)
-      except queue.Empty:
-        continue
+    while True:
+      path = gate_queue.get()
+      if path is None or stop_event.is_set():
+        return
       try:
         with paths_lock:
           gate_paths.discard(path)
         if not path.exists():
           gate_queue.task_done()
           continue
-        if not is_file_ready(path):
-          gate_queue.task_done()
-          continue
 
         snapshot = get_config_snapshot(config)
         try:
@@ -2511,6 +3147,8 @@ def process_loop(config, stop_event):
         backlog = analysis_queue.qsize()
         with paths_lock:
           backlog += len(analysis_paths)
+          if backlog < MAX_ANALYSIS_BACKLOG:
+            analysis_paths.add(path)
         if backlog >= MAX_ANALYSIS_BACKLOG:
           now = time.time()
           if now - drop_log_state["backlog"] > 10:
@@ -2520,8 +3158,6 @@ def process_loop(config, stop_event):
           gate_queue.task_done()
           continue
 
-        with paths_lock:
-          analysis_paths.add(path)
         analysis_queue.put(path)
         gate_queue.task_done()
       except Exception as error:
@@ -2530,27 +3166,31 @@ def process_loop(config, stop_event):
           gate_paths.discard(path)
         gate_queue.task_done()
 
-  def start_gate_worker(worker_id):
-    thread = threading.Thread(target=gate_worker, args=(worker_id,), daemon=True)
+  def start_worker(label, target, worker_id):
+    def run():
+      try:
+        target(worker_id)
+      finally:
+        if not stop_event.is_set():
+          log_event("error", f"{label} worker {worker_id} stopped, restarting")
+          start_worker(label, target, worker_id)
+
+    thread = threading.Thread(target=run, daemon=True)
     thread.start()
     return thread
 
-  gate_threads = [start_gate_worker(index + 1) for index in range(GATE_WORKERS)]
+  for index in range(GATE_WORKERS):
+    start_worker("Gate", gate_worker, index + 1)
 
   def analysis_worker(worker_id):
-    while not stop_event.is_set():
-      try:
-        path = analysis_queue.get(timeout=0.5)
-      except queue.Empty:
-        continue
+    while True:
+      path = analysis_queue.get()
+      if path is None or stop_event.is_set():
+        return
       try:
         log_event("analysis", f"Worker {worker_id} analyzing segment")
-        if not path.exists():
-          with paths_lock:
-            analysis_paths.discard(path)
-          analysis_queue.task_done()
-          continue
-        analyze_segment(path, config)
+        if path.exists():
+          analyze_segment(path, config)
       except Exception as error:
         log_event("error", f"Analysis worker {worker_id} error: {error}")
       finally:
@@ -2558,94 +3198,92 @@ def process_loop(config, stop_event):
           analysis_paths.discard(path)
         analysis_queue.task_done()
 
-  def start_analysis_worker(worker_id):
-    thread = threading.Thread(target=analysis_worker, args=(worker_id,), daemon=True)
-    thread.start()
-    return thread
+  for index in range(ANALYSIS_WORKERS):
+    start_worker("Analysis", analysis_worker, index + 1)
 
-  analysis_threads = [start_analysis_worker(index + 1) for index in range(ANALYSIS_WORKERS)]
+  def enqueue_gate(path):
+    with paths_lock:
+      if path in gate_paths or path in analysis_paths:
+        return
+      gate_paths.add(path)
+    gate_queue.put(path)
 
+  last_scan = 0.0
   while not stop_event.is_set():
+    sweep_wait = last_scan + SEGMENT_RESCAN_SECONDS - time.time()
+    for path in take_ready_segments(sweep_wait):
+      if path.exists():
+        enqueue_gate(path)
+
     now = time.time()
-    files_with_time = []
-    for path in TMP_DIR.glob("segment_*.wav"):
+    if now - last_scan >= SEGMENT_RESCAN_SECONDS:
+      last_scan = now
+      files_with_time = []
       try:
-        mtime = path.stat().st_mtime
+        entries = list_segment_entries()
       except OSError:
-        continue
-      if now - mtime > MAX_SEGMENT_AGE_SECONDS:
-        with paths_lock:
-          if path in gate_paths or path in analysis_paths:
-            continue
-        path.unlink(missing_ok=True)
-        if now - drop_log_state["stale"] > 10:
-          log_event("analysis", f"Dropped stale segment (> {int(MAX_SEGMENT_AGE_SECONDS)}s old)")
-          drop_log_state["stale"] = now
-        continue
-      files_with_time.append((mtime, path))
-    files_with_time.sort(key=lambda item: item[0])
-    files = [path for _, path in files_with_time]
-
-    if now - last_worker_check >= 5:
-      for index, thread in enumerate(list(gate_threads)):
-        if not thread.is_alive():
-          log_event("error", f"Gate worker {index + 1} stopped, restarting")
-          gate_threads[index] = start_gate_worker(index + 1)
-      for index, thread in enumerate(list(analysis_threads)):
-        if not thread.is_alive():
-          log_event("error", f"Analysis worker {index + 1} stopped, restarting")
-          analysis_threads[index] = start_analysis_worker(index + 1)
-      last_worker_check = now
-    if len(files) > MAX_QUEUE_SEGMENTS:
-      drop_count = len(files) - MAX_QUEUE_SEGMENTS
-      dropped = 0
-      for path in files:
-        if dropped >= drop_count:
-          break
-        with paths_lock:
-          if path in gate_paths or path in analysis_paths:
+        entries = []
+      with paths_lock:
+        busy = gate_paths | analysis_paths
+      for entry in entries:
+        try:
+          mtime = entry.stat().st_mtime
+        except OSError:
+          continue
+        path = Path(entry.path)
+        if now - mtime > MAX_SEGMENT_AGE_SECONDS:
+          if path in busy:
             continue
-          gate_paths.discard(path)
-          analysis_paths.discard(path)
-        path.unlink(missing_ok=True)
-        dropped += 1
-      if dropped:
-        log_event("analysis", f"Dropped {dropped} queued segments to cap queue at {MAX_QUEUE_SEGMENTS}")
-      files = [path for path in files if path.exists()]
-
-    gate_size = gate_queue.qsize()
-    analysis_size = analysis_queue.qsize()
-    with paths_lock:
-      active_count = len(analysis_paths)
-      gate_pending = len(gate_paths)
-    tmp_count = len(files)
-    oldest_age = 0
-    if files_with_time:
-      oldest_age = max(0, now - files_with_time[0][0])
-    status_payload = (tmp_count, gate_pending, gate_size, analysis_size, active_count, int(oldest_age))
-    if status_payload != last_status_payload:
-      if now - last_status_report >= 5:
-        log_event(
-          "analysis",
-          f"Status: tmp {tmp_count}, gate {gate_pending + gate_size}, analysis {analysis_size}, active {active_count}, oldest {int(oldest_age)}s",
-        )
-        last_status_report = now
-        last_status_payload = status_payload
-    if not files:
-      time.sleep(0.2)
-    else:
-      for path in files:
-        if stop_event.is_set():
+          path.unlink(missing_ok=True)
+          if now - drop_log_state["stale"] > 10:
+            log_event("analysis", f"Dropped stale segment (> {int(MAX_SEGMENT_AGE_SECONDS)}s old)")
+            drop_log_state["stale"] = now
+          continue
+        files_with_time.append((mtime, path))
+      files_with_time.sort(key=lambda item: item[0])
+      files = [path for _, path in files_with_time]
+
+      if len(files) > MAX_QUEUE_SEGMENTS:
+        drop_count = len(files) - MAX_QUEUE_SEGMENTS
+        dropped = set(itertools.islice((path for path in files if path not in busy), drop_count))
+        for path in dropped:
+          path.unlink(missing_ok=True)
+        if dropped:
+          log_event("analysis", f"Dropped {len(dropped)} queued segments to cap queue at {MAX_QUEUE_SEGMENTS}")
+          files_with_time = [item for item in files_with_time if item[1] not in dropped]
+          files = [path for _, path in files_with_time]
+
+      gate_size = gate_queue.qsize()
+      analysis_size = analysis_queue.qsize()
+      with paths_lock:
+        active_count = len(analysis_paths)
+        gate_pending = len(gate_paths)
+      tmp_count = len(files)
+      oldest_age = 0
+      if files_with_time:
+        oldest_age = max(0, now - files_with_time[0][0])
+      status_payload = (tmp_count, gate_pending, gate_size, analysis_size, active_count, int(oldest_age))
+      if status_payload != last_status_payload:
+        if now - last_status_report >= 5:
+          log_event(
+            "analysis",
+            f"Status: tmp {tmp_count}, gate {gate_pending + gate_size}, analysis {analysis_size}, active {active_count}, oldest {int(oldest_age)}s",
+          )
+          last_status_report = now
+          last_status_payload = status_payload
+      slots = max(0, MAX_ANALYSIS_BACKLOG - gate_pending - active_count)
+      for mtime, path in files_with_time:
+        if slots <= 0 or stop_event.is_set():
           break
-        if not is_file_ready(path):
+        if path in busy or not is_file_ready(path, mtime):
           continue
-        with paths_lock:
-          if path in gate_paths or path in analysis_paths:
-            continue
-          gate_paths.add(path)
-        gate_queue.put(path)
+        enqueue_gate(path)
+        slots -= 1
 
-  return
+  for _ in range(GATE_WORKERS):
+    gate_queue.put(None)
+  for _ in range(ANALYSIS_WORKERS):
+    analysis_queue.put(None)
 
 
 def capture_loop(config, stop_event):
@@ -2659,7 +3297,7 @@ def capture_loop(config, stop_event):
       pid = get_current_capture_pid()
       if pid:
         cleanup_capture_processes("watchdog", {pid})
-      time.sleep(5)
+      stop_event.wait(5)
 
   threading.Thread(target=capture_watchdog, daemon=True).start()
   while not stop_event.is_set():
@@ -2707,10 +3345,18 @@ def capture_loop(config, stop_event):
       last_status = payload["status_message"]
     write_latest(payload)
 
-    process = subprocess.Popen(command)
+    try:
+      process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, text=True)
+    except OSError as error:
+      forget_ffmpeg_path()
+      log_event("error", f"Unable to start ffmpeg: {error}")
+      stop_event.wait(2)
+      continue
     set_current_capture_pid(process.pid)
+    threading.Thread(target=watch_segment_list, args=(process,), daemon=True).start()
     restart_requested = False
-    last_segment_time = latest_segment_mtime() or time.time()
+    capture_started = time.time()
+    last_segment_time = latest_segment_mtime() or capture_started
     try:
       segment_seconds = float(snapshot.get("segment_seconds", 3))
     except (TypeError, ValueError):
@@ -2722,7 +3368,9 @@ def capture_loop(config, stop_event):
         restart_capture.clear()
         process.terminate()
         break
-      latest = latest_segment_mtime()
+      latest = get_last_segment_notice()
+      if latest < capture_started:
+        latest = latest_segment_mtime()
       if latest and latest > last_segment_time:
         last_segment_time = latest
         stall_count = 0
@@ -2740,7 +3388,8 @@ def capture_loop(config, stop_event):
         restart_requested = True
         process.terminate()
         break
-      time.sleep(0.5)
+      deadline = last_segment_time + stall_timeout - time.time()
+      restart_capture.wait(min(1.0, max(0.05, deadline)))
 
     if process.poll() is None:
       try:
@@ -2773,303 +3422,430 @@ def capture_loop(config, stop_event):
     time.sleep(2)
 
 
-def make_handler(config):
-  class NoCacheHandler(SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-      super().__init__(*args, directory=str(ROOT), **kwargs)
-
-    def end_headers(self):
-      path = self.path.split("?", 1)[0]
-      if self.path.endswith(".json"):
-        self.send_header("Cache-Control", "no-store, max-age=0")
-      if path.startswith("/api/weather/settings"):
-        self.send_header("Access-Control-Allow-Origin", "*")
-      super().end_headers()
-
-    def _send_json(self, status_code, payload):
-      body = json.dumps(payload, ensure_ascii=True).encode("utf-8")
-      self.send_response(status_code)
-      self.send_header("Content-Type", "application/json; charset=utf-8")
-      self.send_header("Content-Length", str(len(body)))
-      self.send_header("Cache-Control", "no-store, max-age=0")
-      self.end_headers()
-      self.wfile.write(body)
+def find_route(routes, route_prefixes, path):
+  route = routes.get(path)
+  if route is None:
+    route = next((handler for prefix, handler in route_prefixes if path.startswith(prefix)), None)
+  return route
 
-    def _send_csv(self, filename, text):
-      body = text.encode("utf-8")
-      self.send_response(200)
-      self.send_header("Content-Type", "text/csv; charset=utf-8")
-      self.send_header("Content-Length", str(len(body)))
-      self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+
+class NoCacheHandler(SimpleHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+  timeout = CONNECTION_TIMEOUT_SECONDS
+  config = None
+
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, directory=str(ROOT), **kwargs)
+
+  def end_headers(self):
+    if self.path.endswith(".json"):
       self.send_header("Cache-Control", "no-store, max-age=0")
+    if self.path.startswith("/api/weather/settings"):
+      self.send_header("Access-Control-Allow-Origin", "*")
+    super().end_headers()
+
+  def _send_json(self, status_code, payload):
+    self._send_json_body(status_code, encode_json_response(payload))
+
+  def _send_cached_json(self, etag, body):
+    if etag and self.headers.get("If-None-Match") == etag:
+      self.send_response(304)
+      self.send_header("Cache-Control", "no-cache")
+      self.send_header("ETag", etag)
       self.end_headers()
-      self.wfile.write(body)
-
-    def _send_file(self, path, content_type, download_name=None):
+      return
+    self._send_json_body(200, body, etag)
+
+  def _send_json_body(self, status_code, body, etag=None):
+    self.send_response(status_code)
+    self.send_header("Content-Type", "application/json; charset=utf-8")
+    self.send_header("Content-Length", str(len(body)))
+    if etag:
+      self.send_header("Cache-Control", "no-cache")
+      self.send_header("ETag", etag)
+    else:
+      self.send_header("Cache-Control", "no-store, max-age=0")
+    self.end_headers()
+    self.wfile.write(body)
+
+  def _send_csv(self, filename, chunks):
+    # No Content-Length for a streamed body; closing the connection marks its end.
+    self.close_connection = True
+    self.send_response(200)
+    self.send_header("Content-Type", "text/csv; charset=utf-8")
+    self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+    self.send_header("Cache-Control", "no-store, max-age=0")
+    self.send_header("Connection", "close")
+    self.end_headers()
+    for chunk in chunks:
+      self.wfile.write(chunk.encode("utf-8"))
+
+  def _send_file(self, path, content_type, download_name=None):
+    try:
+      handle = open(path, "rb")
+    except OSError:
+      self.send_error(404, "File not found")
+      return
+    with handle:
       try:
-        body = Path(path).read_bytes()
+        size = os.fstat(handle.fileno()).st_size
       except OSError:
         self.send_error(404, "File not found")
         return
       self.send_response(200)
       self.send_header("Content-Type", content_type)
-      self.send_header("Content-Length", str(len(body)))
+      self.send_header("Content-Length", str(size))
       if download_name:
         self.send_header("Content-Disposition", f'attachment; filename="{download_name}"')
       self.send_header("Cache-Control", "no-store, max-age=0")
       self.end_headers()
-      self.wfile.write(body)
-
-    def _read_json(self):
-      try:
-        length = int(self.headers.get("Content-Length", "0"))
-      except ValueError:
-        return None
-      if length <= 0:
-        return None
+      self.wfile.flush()
       try:
-        raw = self.rfile.read(length)
-        return json.loads(raw.decode("utf-8"))
-      except (OSError, json.JSONDecodeError, UnicodeDecodeError):
-        return None
+        self.connection.sendfile(handle, 0, size)
+      except (BrokenPipeError, ConnectionResetError):
+        self.close_connection = True
 
-    def _auth_settings(self):
-      with config_lock:
-        enabled = bool(config.get("settings_auth_enabled"))
-        user = str(config.get("settings_auth_user") or "admin").strip() or "admin"
-        password_hash = str(config.get("settings_auth_password_hash") or "").strip()
-      if not enabled or not password_hash:
-        return {"enabled": False, "user": user, "password_hash": password_hash}
-      return {"enabled": True, "user": user, "password_hash": password_hash}
-
-    def _requires_auth(self, path):
-      if (
-        path.startswith("/api/status")
-        or path.startswith("/api/weather/settings")
-        or path.startswith("/api/log/activity")
-      ):
-        return False
-      if path.startswith("/weather/") or path in {"/weather", "/weather/"}:
-        return False
-      if path.startswith("/data/icons/"):
-        return False
-      if path in {"/", "/index.html", "/app.js", "/styles.css"}:
-        return False
-      if path in {"/settings", "/settings/", "/settings.html", "/settings.js", "/settings.css"}:
-        return True
-      if path.startswith("/api/"):
-        return True
+  def _read_json(self):
+    try:
+      length = int(self.headers.get("Content-Length", "0"))
+    except ValueError:
+      return None
+    if length <= 0:
+      return None
+    if length > MAX_JSON_BODY_BYTES:
+      # The unread body would desync keep-alive, so drop the connection after replying.
+      self.close_connection = True
+      return None
+    try:
+      raw = self.rfile.read(length)
+      return json.loads(raw)
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+      return None
+
+  def _read_json_object(self):
+    data = self._read_json()
+    return data if isinstance(data, dict) else None
+
+  def _requires_auth(self, path):
+    if (
+      path.startswith("/api/status")
+      or path.startswith("/api/weather/settings")
+      or path.startswith("/api/log/activity")
+    ):
       return False
+    if path.startswith("/weather/") or path in {"/weather", "/weather/"}:
+      return False
+    if path.startswith("/data/icons/"):
+      return False
+    if path in {"/", "/index.html", "/app.js", "/styles.css"}:
+      return False
+    if path in {"/settings", "/settings/", "/settings.html", "/settings.js", "/settings.css"}:
+      return True
+    if path.startswith("/api/"):
+      return True
+    return False
 
-    def _is_authorized(self):
-      settings = self._auth_settings()
-      if not settings.get("enabled"):
-        return True
-      header = self.headers.get("Authorization", "")
-      if not header.startswith("Basic "):
-        return False
-      token = header.split(" ", 1)[1].strip()
-      try:
-        decoded = base64.b64decode(token).decode("utf-8")
-      except (ValueError, UnicodeDecodeError):
-        return False
-      if ":" not in decoded:
-        return False
-      user, password = decoded.split(":", 1)
-      if not hmac.compare_digest(str(user), settings["user"]):
-        return False
-      return verify_password(password, settings["password_hash"])
-
-    def _require_auth(self):
-      self.send_response(401)
-      self.send_header("WWW-Authenticate", 'Basic realm="Feather Front Settings"')
-      self.send_header("Cache-Control", "no-store, max-age=0")
-      self.send_header("Content-Length", "0")
-      self.end_headers()
+  def _is_authorized(self):
+    settings = get_auth_settings(self.config)
+    if not settings.get("enabled"):
+      return True
+    header = self.headers.get("Authorization", "")
+    credentials = (settings["user"], settings["password_hash"])
+    if auth_verified.get(header) == credentials:
+      return True
+    if not header.startswith("Basic "):
+      return False
+    token = header.split(" ", 1)[1].strip()
+    try:
+      decoded = base64.b64decode(token).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+      return False
+    if ":" not in decoded:
+      return False
+    user, password = decoded.split(":", 1)
+    if not hmac.compare_digest(str(user), settings["user"]):
+      return False
+    if not verify_password(password, settings["password_hash"]):
+      return False
+    # Only headers that passed PBKDF2 are remembered, so failed guesses cannot evict them.
+    if len(auth_verified) >= AUTH_VERIFIED_MAX:
+      auth_verified.clear()
+    auth_verified[header] = credentials
+    return True
 
-    def do_GET(self):
-      path = self.path.split("?", 1)[0]
-      if self._requires_auth(path) and not self._is_authorized():
-        return self._require_auth()
-      if path in {"/settings", "/settings/"}:
-        self.path = "/settings.html"
-        return super().do_GET()
-      if path in {"/weather", "/weather/", "/weather/index.html"}:
-        return self._send_file(WEATHER_ROOT / "index.html", "text/html; charset=utf-8")
-      if path == "/weather/app.js":
-        return self._send_file(WEATHER_ROOT / "app.js", "application/javascript; charset=utf-8")
-      if path == "/weather/styles.css":
-        return self._send_file(WEATHER_ROOT / "styles.css", "text/css; charset=utf-8")
-      if path.startswith("/api/status"):
-        payload = {}
-        if LATEST_PATH.exists():
-          try:
-            payload = json.loads(LATEST_PATH.read_text(encoding="utf-8"))
-          except (OSError, json.JSONDecodeError):
-            payload = {}
-        return self._send_json(200, payload)
-      if path.startswith("/api/settings"):
-        return self._send_json(200, get_config_snapshot(config))
-      if path.startswith("/api/discord/settings"):
-        return self._send_json(200, get_discord_settings_snapshot(config))
-      if path.startswith("/api/weather/settings"):
-        snapshot = get_config_snapshot(config)
-        payload = {
-          "weather_location": str(snapshot.get("weather_location") or "YOUR_ZIP"),
-          "weather_unit": str(snapshot.get("weather_unit") or "fahrenheit"),
-        }
-        return self._send_json(200, payload)
-      if path.startswith("/api/inputs"):
-        devices, error = list_audio_inputs()
-        response = {"devices": devices, "error": error}
-        return self._send_json(200, response)
-      if path.startswith("/api/queue"):
-        return self._send_json(200, {"pending": count_pending_segments()})
-      if path.startswith("/api/log/summary"):
-        return self._send_json(200, summarize_log())
-      if path.startswith("/api/log/activity"):
-        query = parse_qs(urlsplit(self.path).query)
-        days = query.get("days", ["7"])[0]
-        return self._send_json(200, build_activity_curve(days))
-      if path.startswith("/api/clip"):
-        query = parse_qs(urlsplit(self.path).query)
-        species = (query.get("species") or [""])[0]
-        species = str(species).strip()
-        if not species:
-          return self.send_error(400, "Missing species")
-        index = load_clip_index()
-        clip = index.get(species)
-        if not clip or not clip.get("filename"):
-          return self.send_error(404, "Clip not found")
-        path = CLIPS_DIR / clip["filename"]
-        download = (query.get("download") or [""])[0]
-        download_name = None
-        if str(download).strip() == "1":
-          download_name = clip["filename"]
-        return self._send_file(path, "audio/wav", download_name)
-      if path.startswith("/api/log/csv"):
-        entries = read_log(None)
-        payload = build_log_csv(entries)
-        return self._send_csv("birdnet_detections.csv", payload)
-      if path.startswith("/api/log"):
-        query = parse_qs(urlsplit(self.path).query)
-        try:
-          limit = int(query.get("limit", ["200"])[0])
-        except ValueError:
-          limit = 200
-        limit = max(0, min(1000, limit))
-        return self._send_json(200, {"entries": read_log(limit)})
-      if path.startswith("/api/events"):
-        query = parse_qs(urlsplit(self.path).query)
-        try:
-          limit = int(query.get("limit", ["200"])[0])
-        except ValueError:
-          limit = 200
-        limit = max(0, min(1000, limit))
-        return self._send_json(200, {"entries": read_events(limit)})
-      super().do_GET()
-
-    def do_POST(self):
-      path = self.path.split("?", 1)[0]
-      if self._requires_auth(path) and not self._is_authorized():
-        return self._require_auth()
-      if path.startswith("/api/icon/upload"):
-        content_type = self.headers.get("Content-Type", "")
-        if "multipart/form-data" not in content_type:
-          return self._send_json(400, {"ok": False, "error": "Expected multipart form"})
-        form = cgi.FieldStorage(
-          fp=self.rfile,
-          headers=self.headers,
-          environ={
-            "REQUEST_METHOD": "POST",
-            "CONTENT_TYPE": content_type,
-            "CONTENT_LENGTH": self.headers.get("Content-Length", "0"),
-          },
-        )
-        species = str(form.getvalue("species", "")).strip()
-        if not species:
-          return self._send_json(400, {"ok": False, "error": "Species is required"})
-        file_item = form["icon"] if "icon" in form else None
-        if isinstance(file_item, list):
-          file_item = file_item[0] if file_item else None
-        if file_item is None or not hasattr(file_item, "file") or file_item.file is None:
-          return self._send_json(400, {"ok": False, "error": "Icon file missing"})
-        payload = file_item.file.read()
-        icon_url, error = save_species_icon(species, payload)
-        if error:
-          return self._send_json(400, {"ok": False, "error": error})
-        bump_log_revision()
-        refresh_last_detection(config)
-        return self._send_json(200, {"ok": True, "icon_url": icon_url})
-      if path.startswith("/api/icon/delete"):
-        data = self._read_json()
-        if data is None or not isinstance(data, dict):
-          return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
-        species = str(data.get("species", "")).strip()
-        if not species:
-          return self._send_json(400, {"ok": False, "error": "Species is required"})
-        removed = remove_species_icon(species)
-        if removed:
-          bump_log_revision()
-          refresh_last_detection(config)
-        return self._send_json(200, {"ok": removed})
-      if path.startswith("/api/settings"):
-        data = self._read_json()
-        if data is None or not isinstance(data, dict):
-          return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
-        changed = update_config(config, data)
-        return self._send_json(200, {"ok": True, "changed": sorted(changed)})
-      if path.startswith("/api/discord/settings"):
-        data = self._read_json()
-        if data is None or not isinstance(data, dict):
-          return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
-        changed = update_discord_settings(config, data)
-        return self._send_json(200, {"ok": True, "changed": sorted(changed)})
-      if path.startswith("/api/restart/server"):
-        log_event("server", "Server restart requested")
-        self._send_json(200, {"ok": True})
-        threading.Thread(target=restart_server_process, daemon=True).start()
-        return
-      if path.startswith("/api/restart"):
-        restart_capture.set()
-        log_event("server", "Capture restart requested")
-        return self._send_json(200, {"ok": True})
-      if path.startswith("/api/log/delete"):
-        data = self._read_json()
-        if data is None or not isinstance(data, dict):
-          return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
-        entry_id_value = str(data.get("id", "")).strip()
-        if not entry_id_value:
-          return self._send_json(400, {"ok": False, "error": "Missing id"})
-        removed = delete_log_entry(entry_id_value)
-        if removed:
-          refresh_last_detection(config)
-        return self._send_json(200, {"ok": removed})
-      if path.startswith("/api/log/add"):
-        data = self._read_json()
-        if data is None or not isinstance(data, dict):
-          return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
-        entry, error = add_manual_log_entry(data, config)
-        if error:
-          return self._send_json(400, {"ok": False, "error": error})
-        return self._send_json(200, {"ok": True, "entry": entry})
-      return super().do_POST()
+  def _require_auth(self):
+    self.send_response(401)
+    self.send_header("WWW-Authenticate", 'Basic realm="Feather Front Settings"')
+    self.send_header("Cache-Control", "no-store, max-age=0")
+    self.send_header("Content-Length", "0")
+    self.end_headers()
+
+  def do_GET(self):
+    path, _, query_string = self.path.partition("?")
+    if path.startswith("/api/status"):
+      return self._send_cached_json(*get_latest_body())
+    query = parse_qs(query_string) if query_string else {}
+    if self._requires_auth(path) and not self._is_authorized():
+      return self._require_auth()
+    route = find_route(self.get_routes, self.get_route_prefixes, path)
+    if route:
+      return route(self, query)
+    super().do_GET()
+
+  def do_POST(self):
+    # Not every error path consumes the request body, so POSTs never keep the connection.
+    self.close_connection = True
+    path = self.path.split("?", 1)[0]
+    if self._requires_auth(path) and not self._is_authorized():
+      return self._require_auth()
+    route = find_route(self.post_routes, self.post_route_prefixes, path)
+    if route:
+      return route(self)
+    return self.send_error(404, "Not found")
+
+  def _get_settings_page(self, query):
+    self.path = "/settings.html"
+    return super().do_GET()
+
+  def _get_weather_page(self, query):
+    return self._send_file(WEATHER_ROOT / "index.html", "text/html; charset=utf-8")
+
+  def _get_weather_script(self, query):
+    return self._send_file(WEATHER_ROOT / "app.js", "application/javascript; charset=utf-8")
+
+  def _get_weather_styles(self, query):
+    return self._send_file(WEATHER_ROOT / "styles.css", "text/css; charset=utf-8")
+
+  def _get_settings(self, query):
+    return self._send_cached_json(*get_settings_body(self.config))
+
+  def _get_discord_settings(self, query):
+    return self._send_json(200, get_discord_settings_snapshot(self.config))
+
+  def _get_weather_settings(self, query):
+    snapshot = get_config_snapshot(self.config)
+    payload = {
+      "weather_location": str(snapshot.get("weather_location") or "YOUR_ZIP"),
+      "weather_unit": str(snapshot.get("weather_unit") or "fahrenheit"),
+    }
+    return self._send_json(200, payload)
+
+  def _get_inputs(self, query):
+    devices, error = list_audio_inputs()
+    response = {"devices": devices, "error": error}
+    return self._send_json(200, response)
+
+  def _get_queue(self, query):
+    return self._send_json(200, {"pending": count_pending_segments()})
+
+  def _get_log_summary(self, query):
+    return self._send_json(200, summarize_log())
+
+  def _get_log_activity(self, query):
+    days = query.get("days", ["7"])[0]
+    return self._send_json(200, build_activity_curve(days))
+
+  def _get_clip(self, query):
+    species = (query.get("species") or [""])[0]
+    species = str(species).strip()
+    if not species:
+      return self.send_error(400, "Missing species")
+    index = load_clip_index()
+    clip = index.get(species)
+    if not clip or not clip.get("filename"):
+      return self.send_error(404, "Clip not found")
+    path = CLIPS_DIR / clip["filename"]
+    download = (query.get("download") or [""])[0]
+    download_name = None
+    if str(download).strip() == "1":
+      download_name = clip["filename"]
+    return self._send_file(path, "audio/wav", download_name)
+
+  def _get_log_csv(self, query):
+    payload = build_log_csv(iter_log())
+    return self._send_csv("birdnet_detections.csv", payload)
+
+  def _get_log(self, query):
+    try:
+      limit = int(query.get("limit", ["200"])[0])
+    except ValueError:
+      limit = 200
+    limit = max(0, min(1000, limit))
+    return self._send_json(200, {"entries": read_log(limit)})
+
+  def _get_events(self, query):
+    try:
+      limit = int(query.get("limit", ["200"])[0])
+    except ValueError:
+      limit = 200
+    limit = max(0, min(1000, limit))
+    return self._send_json(200, {"entries": read_events(limit)})
+
+  def _post_icon_upload(self):
+    content_type = self.headers.get("Content-Type", "")
+    if "multipart/form-data" not in content_type:
+      return self._send_json(400, {"ok": False, "error": "Expected multipart form"})
+    try:
+      length = int(self.headers.get("Content-Length", "0"))
+    except ValueError:
+      length = 0
+    if length > MAX_ICON_UPLOAD_BYTES:
+      return self._send_json(400, {"ok": False, "error": "Icon upload too large"})
+    try:
+      form = read_multipart_form(self.rfile, content_type, length)
+    except OSError:
+      form = None
+    if form is None:
+      return self._send_json(400, {"ok": False, "error": "Invalid multipart form"})
+    fields, files = form
+    try:
+      species = fields.get("species", b"").decode("utf-8", "replace").strip()
+      if not species:
+        return self._send_json(400, {"ok": False, "error": "Species is required"})
+      icon_file = files.get("icon")
+      if icon_file is None:
+        return self._send_json(400, {"ok": False, "error": "Icon file missing"})
+      icon_url, error = save_species_icon(species, icon_file)
+    finally:
+      for handle in files.values():
+        handle.close()
+    if error:
+      return self._send_json(400, {"ok": False, "error": error})
+    bump_log_revision()
+    refresh_last_detection(self.config)
+    return self._send_json(200, {"ok": True, "icon_url": icon_url})
+
+  def _post_icon_delete(self):
+    data = self._read_json_object()
+    if data is None:
+      return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
+    species = str(data.get("species", "")).strip()
+    if not species:
+      return self._send_json(400, {"ok": False, "error": "Species is required"})
+    removed = remove_species_icon(species)
+    if removed:
+      bump_log_revision()
+      refresh_last_detection(self.config)
+    return self._send_json(200, {"ok": removed})
+
+  def _post_settings(self):
+    data = self._read_json_object()
+    if data is None:
+      return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
+    changed = update_config(self.config, data)
+    return self._send_json(200, {"ok": True, "changed": sorted(changed)})
+
+  def _post_discord_settings(self):
+    data = self._read_json_object()
+    if data is None:
+      return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
+    changed = update_discord_settings(self.config, data)
+    return self._send_json(200, {"ok": True, "changed": sorted(changed)})
+
+  def _post_restart_server(self):
+    log_event("server", "Server restart requested")
+    self._send_json(200, {"ok": True})
+    threading.Thread(target=restart_server_process, daemon=True).start()
+
+  def _post_restart(self):
+    restart_capture.set()
+    log_event("server", "Capture restart requested")
+    return self._send_json(200, {"ok": True})
+
+  def _post_log_delete(self):
+    data = self._read_json_object()
+    if data is None:
+      return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
+    entry_id_value = str(data.get("id", "")).strip()
+    if not entry_id_value:
+      return self._send_json(400, {"ok": False, "error": "Missing id"})
+    removed = delete_log_entry(entry_id_value)
+    if removed:
+      refresh_last_detection(self.config)
+    return self._send_json(200, {"ok": removed})
+
+  def _post_log_add(self):
+    data = self._read_json_object()
+    if data is None:
+      return self._send_json(400, {"ok": False, "error": "Invalid JSON"})
+    entry, error = add_manual_log_entry(data, self.config)
+    if error:
+      return self._send_json(400, {"ok": False, "error": error})
+    return self._send_json(200, {"ok": True, "entry": entry})
+
+  # Prefix routes are tried in order, so longer paths must come before their parents.
+  get_route_prefixes = (
+    ("/api/settings", _get_settings),
+    ("/api/discord/settings", _get_discord_settings),
+    ("/api/weather/settings", _get_weather_settings),
+    ("/api/inputs", _get_inputs),
+    ("/api/queue", _get_queue),
+    ("/api/log/summary", _get_log_summary),
+    ("/api/log/activity", _get_log_activity),
+    ("/api/clip", _get_clip),
+    ("/api/log/csv", _get_log_csv),
+    ("/api/log", _get_log),
+    ("/api/events", _get_events),
+  )
+  get_routes = {
+    "/settings": _get_settings_page,
+    "/settings/": _get_settings_page,
+    "/weather": _get_weather_page,
+    "/weather/": _get_weather_page,
+    "/weather/index.html": _get_weather_page,
+    "/weather/app.js": _get_weather_script,
+    "/weather/styles.css": _get_weather_styles,
+    **dict(get_route_prefixes),
+  }
+  post_route_prefixes = (
+    ("/api/icon/upload", _post_icon_upload),
+    ("/api/icon/delete", _post_icon_delete),
+    ("/api/settings", _post_settings),
+    ("/api/discord/settings", _post_discord_settings),
+    ("/api/restart/server", _post_restart_server),
+    ("/api/restart", _post_restart),
+    ("/api/log/delete", _post_log_delete),
+    ("/api/log/add", _post_log_add),
+  )
+  post_routes = dict(post_route_prefixes)
 
-  return NoCacheHandler
+
+class OverlayHTTPServer(ThreadingHTTPServer):
+  request_queue_size = 64
+
+
+def make_handler(config):
+  return type("NoCacheHandler", (NoCacheHandler,), {"config": config})
 
 
 def run_server(config, stop_event):
   handler = make_handler(config)
-  server = ThreadingHTTPServer(("", config["http_port"]), handler)
+  server = OverlayHTTPServer(("", config["http_port"]), handler)
+  wake_reader, wake_writer = socket.socketpair()
+  wake_reader.setblocking(False)
+  wake_writer.setblocking(False)
+  signal.set_wakeup_fd(wake_writer.fileno())
 
   def shutdown(*_):
     stop_event.set()
-    server.shutdown()
 
   signal.signal(signal.SIGINT, shutdown)
   signal.signal(signal.SIGTERM, shutdown)
 
-  server.serve_forever(poll_interval=0.5)
+  with selectors.DefaultSelector() as selector:
+    selector.register(server, selectors.EVENT_READ)
+    selector.register(wake_reader, selectors.EVENT_READ)
+    while not stop_event.is_set():
+      for key, _ in selector.select(SERVER_IDLE_TIMEOUT_SECONDS):
+        if key.fileobj is wake_reader:
+          try:
+            wake_reader.recv(64)
+          except BlockingIOError:
+            pass
+        elif not stop_event.is_set():
+          server.handle_request()
+  signal.set_wakeup_fd(-1)
+  server.server_close()
 
 
 def main():
@@ -3080,12 +3856,15 @@ def main():
   capture_thread = threading.Thread(target=capture_loop, args=(config, stop_event), daemon=True)
   process_thread = threading.Thread(target=process_loop, args=(config, stop_event), daemon=True)
   discord_thread = threading.Thread(target=discord_summary_loop, args=(config, stop_event), daemon=True)
+  db_thread = threading.Thread(target=db_maintenance_loop, args=(stop_event,), daemon=True)
 
   capture_thread.start()
   process_thread.start()
   discord_thread.start()
+  db_thread.start()
 
   run_server(config, stop_event)
+  flush_pending_writes()
 
 
 if __name__ == "__main__":
@@ -444,7 +444,7 @@ async function loadInputs() {
 
 async function loadSettings() {
   try {
-    const response = await fetch("/api/settings", { cache: "no-store" });
+    const response = await fetch("/api/settings", { cache: "no-cache" });
     const data = await response.json();
     currentHttpPort = normalizePort(data.http_port ?? 8002);
     if (elements.httpPort) {